@@ -1,29 +1,214 @@
 #!/usr/bin/env python3
 
+import datetime
 import logging
+import os
 from .eonnext import EonNext
+from .gas import read_calorific_values_csv
+from .profiling import run_profiled, span
+from .transport import AiohttpTransport
+
+try:
+    from homeassistant.helpers import config_validation as cv
+except ImportError:
+    # The command line tool imports this package without Home Assistant installed
+    cv = None
 
 _LOGGER = logging.getLogger(__name__)
 
 DOMAIN = "eon_next"
 CONF_EMAIL = "email"
+
+# Set up from config entries only, there are no YAML options
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN) if cv is not None else None
 CONF_PASSWORD = "password"
 
+CONF_READINGS_INTERVAL = "readings_interval"
+CONF_TARIFFS_INTERVAL = "tariffs_interval"
+CONF_DISPATCHES_INTERVAL = "dispatches_interval"
+CONF_SESSIONS_INTERVAL = "sessions_interval"
+CONF_MAX_CONCURRENT_REQUESTS = "max_concurrent_requests"
+CONF_READINGS_CACHE_TTL = "readings_cache_ttl"
+CONF_DISPATCHES_CACHE_TTL = "dispatches_cache_ttl"
+CONF_TARIFFS_CACHE_TTL = "tariffs_cache_ttl"
+
+# Poll intervals are in seconds, cache TTLs in minutes where 0 keeps the built in behaviour
+DEFAULT_OPTIONS = {
+    CONF_READINGS_INTERVAL: 30,
+    CONF_TARIFFS_INTERVAL: 30,
+    CONF_DISPATCHES_INTERVAL: 30,
+    CONF_SESSIONS_INTERVAL: 3600,
+    CONF_MAX_CONCURRENT_REQUESTS: 4,
+    CONF_READINGS_CACHE_TTL: 0,
+    CONF_DISPATCHES_CACHE_TTL: 0,
+    CONF_TARIFFS_CACHE_TTL: 0
+}
+
+DATA_COORDINATORS = "coordinators"
+
+SERVICE_PROFILE_REFRESH = "profile_refresh"
+SERVICE_RELOAD_CALORIFIC_VALUES = "reload_calorific_values"
+
+# Daily gas calorific values, as date,value rows, read from the config directory
+CALORIFIC_VALUES_FILE = "eon_next_calorific_values.csv"
+
+# Sessions validated by the config flow, waiting to be picked up by entry setup
+DATA_SESSION_HANDOFF = "session_handoff"
+
+
+def get_option(entry, key: str) -> int:
+    return entry.options.get(key, DEFAULT_OPTIONS[key])
+
+
+def _minutes(value: int) -> datetime.timedelta:
+    if not value:
+        return None
+    return datetime.timedelta(minutes=value)
+
+
+def apply_api_options(api: EonNext, entry):
+    """Apply the entry's options to the API client"""
+    api.scheduler.configure(max_concurrent=get_option(entry, CONF_MAX_CONCURRENT_REQUESTS))
+    api.readings_cache_ttl = _minutes(get_option(entry, CONF_READINGS_CACHE_TTL))
+    api.dispatches_cache_ttl = _minutes(get_option(entry, CONF_DISPATCHES_CACHE_TTL))
+    api.tariffs_cache_ttl = _minutes(get_option(entry, CONF_TARIFFS_CACHE_TTL))
+
+
+async def async_update_options(hass, entry):
+    """Apply changed options to the running entry, without reloading it."""
+    api = hass.data[DOMAIN][entry.entry_id]
+    apply_api_options(api, entry)
+
+    for coordinator in hass.data[DOMAIN].get(DATA_COORDINATORS, {}).get(entry.entry_id, []):
+        coordinator.apply_options(entry)
+        await coordinator.async_request_refresh()
+
+
+async def async_profile_refresh(hass, call):
+    """Run one complete refresh of every account and write a profile report to the config directory."""
+    coordinators = [
+        coordinator
+        for entry_coordinators in hass.data[DOMAIN].get(DATA_COORDINATORS, {}).values()
+        for coordinator in entry_coordinators
+    ]
+
+    async def refresh():
+        for api in set(coordinator.account.api for coordinator in coordinators):
+            api.invalidate_caches()
+
+        for coordinator in coordinators:
+            with span(coordinator.name):
+                await coordinator.async_refresh()
+
+    profile = await run_profiled("profile_refresh", refresh)
+
+    path = hass.config.path(f"eon_next_profile_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.txt")
+
+    def write_report():
+        # Formatting the pstats output is slow enough to keep off the event loop too
+        with open(path, "w") as handle:
+            handle.write(profile.report())
+
+    await hass.async_add_executor_job(write_report)
+    _LOGGER.info(f"Refresh profile written to {path}")
+
+
+async def async_load_calorific_values(hass, api: EonNext) -> None:
+    """Replace every account's calorific values with those in the config directory's CSV file, if there is one."""
+    path = hass.config.path(CALORIFIC_VALUES_FILE)
+
+    def read_values():
+        if not os.path.exists(path):
+            return None
+        return read_calorific_values_csv(path)
+
+    values = await hass.async_add_executor_job(read_values)
+    if values is None:
+        return
+
+    for account in api.accounts:
+        account.calorific_values.replace(values)
+    _LOGGER.debug(f"Loaded {len(values)} calorific values from {path}")
+
+
+async def async_reload_calorific_values(hass, call):
+    """Reload calorific values for every entry and update the gas sensors."""
+    for entry_id, coordinators in hass.data[DOMAIN].get(DATA_COORDINATORS, {}).items():
+        api = hass.data[DOMAIN].get(entry_id)
+        if api is None:
+            continue
+        await async_load_calorific_values(hass, api)
+        for coordinator in coordinators:
+            coordinator.async_update_listeners()
+
+
+def store_session_handoff(hass, email: str, session: dict):
+    """Keep a freshly validated session in memory for the entry about to be set up"""
+    hass.data.setdefault(DOMAIN, {}).setdefault(DATA_SESSION_HANDOFF, {})[email.lower()] = session
+
+
+def pop_session_handoff(hass, email: str) -> dict:
+    return hass.data.get(DOMAIN, {}).get(DATA_SESSION_HANDOFF, {}).pop(email.lower(), None)
+
+
+async def async_setup(hass, config):
+    """Register the integration's services, once for all entries."""
+    hass.data.setdefault(DOMAIN, {})
+
+    async def profile_refresh(call):
+        await async_profile_refresh(hass, call)
+
+    async def reload_calorific_values(call):
+        await async_reload_calorific_values(hass, call)
+
+    hass.services.async_register(DOMAIN, SERVICE_PROFILE_REFRESH, profile_refresh)
+    hass.services.async_register(DOMAIN, SERVICE_RELOAD_CALORIFIC_VALUES, reload_calorific_values)
+    return True
+
 
 async def async_setup_entry(hass, entry):
     """Set up platform from a ConfigEntry."""
     hass.data.setdefault(DOMAIN, {})
 
-    api = EonNext()
-    success = await api.login_with_username_and_password(entry.data[CONF_EMAIL], entry.data[CONF_PASSWORD])
+    # Imported here so the package itself, and with it the CLI, needs no Home Assistant
+    from homeassistant.helpers.aiohttp_client import async_get_clientsession
+
+    api = EonNext(AiohttpTransport(session=async_get_clientsession(hass)))
+    api.username = entry.data[CONF_EMAIL]
+    api.password = entry.data[CONF_PASSWORD]
+    apply_api_options(api, entry)
+    # The sensor platform loads each account subsystem only if it has enabled entities
+    api.initial_subsystems = []
+
+    success = False
+    session = pop_session_handoff(hass, entry.data[CONF_EMAIL])
+    if session is not None:
+        success = await api.login_with_session(session)
+
+    if success == False:
+        success = await api.login_with_username_and_password(entry.data[CONF_EMAIL], entry.data[CONF_PASSWORD])
 
     if success == True:
 
         hass.data[DOMAIN][entry.entry_id] = api
+        await async_load_calorific_values(hass, api)
+        entry.async_on_unload(entry.add_update_listener(async_update_options))
 
         await hass.config_entries.async_forward_entry_setups(entry, ["sensor"])
 
         return True
     
     else:
-        return False
\ No newline at end of file
+        return False
+
+
+
+async def async_unload_entry(hass, entry):
+    """Unload a ConfigEntry, so it can be reloaded when entities are enabled or disabled."""
+    unloaded = await hass.config_entries.async_unload_platforms(entry, ["sensor"])
+
+    if unloaded == True:
+        hass.data[DOMAIN].pop(entry.entry_id, None)
+        hass.data[DOMAIN].get(DATA_COORDINATORS, {}).pop(entry.entry_id, None)
+
+    return unloaded
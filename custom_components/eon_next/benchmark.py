@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""Memory benchmark of the domain model over synthetic fleets.
+
+Each fleet is built through the normal account discovery path, with requests
+answered from canned responses by a transport in place of the API, so they are
+still scheduled, profiled and decoded as real ones. The benchmark then reports
+resident memory, the memory held by the model, and the peak and retained
+allocations of one full refresh of every account.
+"""
+
+import datetime
+import gc
+import json
+import os
+import tracemalloc
+
+from .eonnext import EonNext
+
+FLEET_SIZES = [10, 1000, 10000]
+
+# Every synthetic account has one electricity and one gas meter, and one charger
+METERS_PER_ACCOUNT = 2
+
+
+def _meter_selector(variables: dict) -> dict:
+    number = variables['accountNumber']
+    return {"data": {"properties": [{
+        "id": number,
+        "postcode": "AB1 2CD",
+        "electricityMeterPoints": [{"id": number + "-E", "meters": [{"id": number + "-E1", "serialNumber": number + "E"}]}],
+        "gasMeterPoints": [{"id": number + "-G", "meters": [{"id": number + "-G1", "serialNumber": number + "G"}]}]
+    }]}}
+
+
+def _devices(variables: dict) -> dict:
+    return {"data": {"devices": [{
+        "id": variables['accountNumber'] + "-EV",
+        "make": "Synthetic",
+        "model": "Charger",
+        "status": {"current": "LIVE"}
+    }]}}
+
+
+def _agreements(variables: dict) -> dict:
+    return {"data": {"properties": [{"electricityMeterPoints": [{
+        "mpan": variables['accountNumber'] + "0001",
+        "agreements": [{
+            "id": variables['accountNumber'] + "-A",
+            "validFrom": "2024-01-01T00:00:00+00:00",
+            "validTo": None,
+            "tariff": {
+                "displayName": "Next Drive",
+                "fullName": "Next Drive Fixed",
+                "tariffCode": "E-1R-NEXT-DRIVE",
+                "standingCharge": 53.35,
+                "unitRates": [{"value": 6.7}, {"value": 27.03}] * 24
+            }
+        }]
+    }]}]}}
+
+
+def _saving_sessions(variables: dict) -> dict:
+    return {"data": {"appSessions": {"edges": [
+        {"node": {"id": str(day), "startedAt": f"2024-12-{day:02d}T17:00:00+00:00", "endedAt": f"2024-12-{day:02d}T18:00:00+00:00"}}
+        for day in range(1, 4)
+    ]}}}
+
+
+def _readings(variables: dict) -> dict:
+    return {"data": {"readings": {
+        "edges": [{"node": {
+            "id": variables['meterId'] + "-R",
+            "readAt": "2024-12-01T00:00:00+00:00",
+            "readingSource": "SMART",
+            "registers": [{"name": "Total", "value": "12345.6"}],
+            "source": "SMART"
+        }}],
+        "pageInfo": {"endCursor": None, "hasNextPage": False}
+    }}}
+
+
+def _dispatches(variables: dict) -> dict:
+    return {"data": {"flexPlannedDispatches": [
+        {"start": "2024-12-01T23:30:00+00:00", "end": "2024-12-02T01:00:00+00:00", "type": "SMART", "energyAddedKwh": 7.5},
+        {"start": "2024-12-02T02:00:00+00:00", "end": "2024-12-02T05:30:00+00:00", "type": "SMART", "energyAddedKwh": 21.0}
+    ]}}
+
+
+RESPONSES = {
+    "getAccountMeterSelector": _meter_selector,
+    "getAccountDevices": _devices,
+    "getAccountAgreements": _agreements,
+    "getSavingSessions": _saving_sessions,
+    "meterReadingsHistoryTableElectricityReadings": _readings,
+    "meterReadingsHistoryTableGasReadings": _readings,
+    "getSmartChargingSchedule": _dispatches
+}
+
+
+class SyntheticTransport:
+    """Answers every request with its canned response, encoded as the API would send it"""
+
+    async def post(self, operation: str, payload: dict, headers: dict) -> tuple:
+        return 200, json.dumps(RESPONSES[operation](payload.get("variables") or {})).encode()
+
+
+    async def close(self):
+        pass
+
+
+def _synthetic_session(account_count: int) -> dict:
+    expires = int((datetime.datetime.now() + datetime.timedelta(days=1)).timestamp())
+    return {
+        "auth": {
+            "issued": expires,
+            "token": {"token": "synthetic", "expires": expires},
+            "refresh": {"token": "synthetic", "expires": expires}
+        },
+        "account_numbers": [f"A-{index:08d}" for index in range(account_count)]
+    }
+
+
+async def build_fleet(meter_count: int) -> EonNext:
+    api = EonNext(SyntheticTransport())
+    await api.login_with_session(_synthetic_session(max(1, meter_count // METERS_PER_ACCOUNT)))
+    return api
+
+
+async def refresh_fleet(api: EonNext) -> None:
+    """One full refresh of every account, as the coordinators would run it"""
+    for account in api.accounts:
+        for meter in account.meters:
+            await meter._update()
+        for charger in account.ev_chargers:
+            await charger._update()
+        await account._load_tariff_data()
+        await account._load_saving_sessions()
+
+
+def _resident_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as handle:
+            return int(handle.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+
+async def measure_fleet(meter_count: int) -> dict:
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+
+    api = await build_fleet(meter_count)
+    gc.collect()
+    model = tracemalloc.get_traced_memory()[0] - baseline
+
+    # Prime every lazily computed value so the measured refresh is steady state
+    await refresh_fleet(api)
+    gc.collect()
+    before = tracemalloc.get_traced_memory()[0]
+    tracemalloc.reset_peak()
+
+    await refresh_fleet(api)
+    peak = tracemalloc.get_traced_memory()[1]
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0] - before
+    resident = _resident_bytes()
+    tracemalloc.stop()
+
+    meters = sum(len(account.meters) for account in api.accounts)
+    return {
+        "meters": meters,
+        "accounts": len(api.accounts),
+        "resident_bytes": resident,
+        "model_bytes": model,
+        "model_bytes_per_meter": model / meters,
+        "refresh_peak_bytes": peak - before,
+        "refresh_retained_bytes": retained
+    }
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""History of completed smart charging dispatches.
+
+The API only returns planned dispatches, which disappear once they finish.
+`ChargingHistory` watches each polled plan and keeps every dispatch whose end
+has passed, in parallel arrays ordered by start time, so totals over any range
+are a binary search and a sum rather than a scan of stored schedules.
+"""
+
+import array
+import bisect
+import datetime
+import logging
+import math
+
+_LOGGER = logging.getLogger(__name__)
+
+# Boosts charge immediately at the normal rate, every other dispatch type is at the cheap rate
+FULL_RATE_DISPATCH_TYPES = {"BOOST"}
+
+HOUR = 3600
+
+# A dispatch gone from the plan counts as finished only if it was last seen at most this long before
+# its end. Otherwise it may have been cancelled, and the polls were too far apart to tell.
+ROLL_OFF_WINDOW = datetime.timedelta(minutes=15)
+
+
+def _to_timestamp(value: datetime.datetime) -> int:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=datetime.timezone.utc)
+    return int(value.timestamp())
+
+
+def _to_datetime(timestamp: int) -> datetime.datetime:
+    return datetime.datetime.fromtimestamp(timestamp, tz=datetime.timezone.utc)
+
+
+class ChargingHistory:
+    """Completed dispatches for one charger, deduplicated by start time
+
+    A dispatch seen again with a different end or energy, because it was
+    re-planned while running, replaces the earlier record.
+    """
+
+    def __init__(self):
+        self._starts = array.array("q")
+        self._ends = array.array("q")
+        self._energy = array.array("d")
+        self._types = array.array("B")
+        self._type_names = []
+        # Upper bound on any dispatch's duration, so the dispatches overlapping a time can be found by start
+        self._longest = 0
+        # (dispatch, time last seen in the plan) for dispatches yet to finish
+        self._pending = ()
+        # Earliest start changed since the last `take_changes`, None if nothing has
+        self.changed_since = None
+
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+
+    def _type_index(self, name: str) -> int:
+        if name not in self._type_names:
+            self._type_names.append(name)
+        return self._type_names.index(name)
+
+
+    def _record(self, start: int, end: int, energy: float, type_name: str) -> bool:
+        type_index = self._type_index(type_name)
+        position = bisect.bisect_left(self._starts, start)
+
+        if position < len(self._starts) and self._starts[position] == start:
+            same_energy = (
+                self._energy[position] == energy
+                or (math.isnan(self._energy[position]) and math.isnan(energy))
+            )
+            if self._ends[position] == end and same_energy and self._types[position] == type_index:
+                return False
+            self._ends[position] = end
+            self._energy[position] = energy
+            self._types[position] = type_index
+        else:
+            self._starts.insert(position, start)
+            self._ends.insert(position, end)
+            self._energy.insert(position, energy)
+            self._types.insert(position, type_index)
+        self._longest = max(self._longest, end - start)
+
+        if self.changed_since is None or start < self.changed_since:
+            self.changed_since = start
+        return True
+
+
+    def _record_dispatch(self, dispatch) -> bool:
+        energy = dispatch.energy_added_kwh if dispatch.energy_added_kwh is not None else math.nan
+        return self._record(_to_timestamp(dispatch.start), _to_timestamp(dispatch.end), float(energy), dispatch.type)
+
+
+    def observe(self, schedule, now: datetime.datetime) -> int:
+        """Record the dispatches that have finished by `now`, from this plan and the last one
+
+        Returns how many records were added or changed. A dispatch that leaves the
+        plan is recorded only if it was last seen within `ROLL_OFF_WINDOW` of its
+        end, and has ended by now. One that leaves before it ends was cancelled.
+        """
+        schedule = tuple(
+            dispatch for dispatch in (schedule or ())
+            if dispatch.start is not None and dispatch.end is not None
+        )
+        planned = set((dispatch.start, dispatch.end) for dispatch in schedule)
+
+        recorded = 0
+        for dispatch in schedule:
+            if dispatch.end <= now and self._record_dispatch(dispatch):
+                recorded += 1
+
+        for dispatch, last_seen in self._pending:
+            if (dispatch.start, dispatch.end) in planned or dispatch.end > now:
+                continue
+            if dispatch.end - last_seen <= ROLL_OFF_WINDOW and self._record_dispatch(dispatch):
+                recorded += 1
+
+        self._pending = tuple((dispatch, now) for dispatch in schedule if dispatch.end > now)
+        return recorded
+
+
+    def take_changes(self) -> datetime.datetime:
+        """The earliest start changed since the last call, clearing it"""
+        changed_since = self.changed_since
+        self.changed_since = None
+        return _to_datetime(changed_since) if changed_since is not None else None
+
+
+    def _range(self, start: datetime.datetime, end: datetime.datetime) -> range:
+        first = 0 if start is None else bisect.bisect_left(self._starts, _to_timestamp(start))
+        last = len(self._starts) if end is None else bisect.bisect_left(self._starts, _to_timestamp(end))
+        return range(first, last)
+
+
+    def _is_cheap_rate(self, position: int) -> bool:
+        return self._type_names[self._types[position]] not in FULL_RATE_DISPATCH_TYPES
+
+
+    def iter_range(self, start: datetime.datetime = None, end: datetime.datetime = None):
+        """Yield (start, end, type, kWh) for dispatches starting in [start, end)"""
+        for position in self._range(start, end):
+            energy = self._energy[position]
+            yield (
+                _to_datetime(self._starts[position]),
+                _to_datetime(self._ends[position]),
+                self._type_names[self._types[position]],
+                None if math.isnan(energy) else energy
+            )
+
+
+    def energy_added(self, start: datetime.datetime = None, end: datetime.datetime = None, cheap_rate_only: bool = False) -> float:
+        """kWh added by dispatches starting in [start, end)"""
+        total = 0.0
+        for position in self._range(start, end):
+            energy = self._energy[position]
+            if math.isnan(energy) or (cheap_rate_only and not self._is_cheap_rate(position)):
+                continue
+            total += energy
+        return total
+
+
+    def cheap_rate_energy(self, start: datetime.datetime = None, end: datetime.datetime = None) -> float:
+        return self.energy_added(start, end, True)
+
+
+    def energy_by_type(self, start: datetime.datetime = None, end: datetime.datetime = None) -> dict:
+        totals = {}
+        for position in self._range(start, end):
+            energy = self._energy[position]
+            if math.isnan(energy):
+                continue
+            type_name = self._type_names[self._types[position]]
+            totals[type_name] = totals.get(type_name, 0.0) + energy
+        return totals
+
+
+    def _counts(self, position: int, cheap_rate_only: bool) -> bool:
+        return not math.isnan(self._energy[position]) and (not cheap_rate_only or self._is_cheap_rate(position))
+
+
+    def hourly_energy(self, cheap_rate_only: bool = False, since: datetime.datetime = None) -> tuple:
+        """(kWh before the hour of `since`, [(hour start, kWh)] for every hour charged in from it)
+
+        Each dispatch is spread evenly over its duration. Only dispatches that can
+        reach the hour of `since` are spread, those ending earlier are just summed.
+        """
+        since_hour = 0 if since is None else _to_timestamp(since) // HOUR * HOUR
+        # Dispatches starting this early have ended before `since_hour`, whatever their length
+        first = bisect.bisect_left(self._starts, since_hour - self._longest) if since is not None else 0
+
+        before = sum(self._energy[position] for position in range(first) if self._counts(position, cheap_rate_only))
+        buckets = {}
+        for position in range(first, len(self._starts)):
+            if not self._counts(position, cheap_rate_only):
+                continue
+            energy = self._energy[position]
+
+            start = self._starts[position]
+            end = self._ends[position]
+            if end <= start:
+                hour = start - start % HOUR
+                buckets[hour] = buckets.get(hour, 0.0) + energy
+                continue
+
+            hour = start - start % HOUR
+            while hour < end:
+                overlap = min(end, hour + HOUR) - max(start, hour)
+                buckets[hour] = buckets.get(hour, 0.0) + energy * overlap / (end - start)
+                hour += HOUR
+
+        hours = []
+        for hour in sorted(buckets):
+            if hour < since_hour:
+                before += buckets[hour]
+            else:
+                hours.append((_to_datetime(hour), buckets[hour]))
+        return before, hours
+
+
+    def as_dict(self) -> dict:
+        return {
+            "starts": self._starts.tolist(),
+            "ends": self._ends.tolist(),
+            "energy": [None if math.isnan(energy) else energy for energy in self._energy],
+            "types": [self._type_names[index] for index in self._types]
+        }
+
+
+    def restore(self, data: dict) -> None:
+        """Merge records saved by `as_dict`, without marking them as changed
+
+        Starts already recorded are kept as they are, being at least as new as the saved ones.
+        """
+        changed_since = self.changed_since
+        for start, end, energy, type_name in zip(data['starts'], data['ends'], data['energy'], data['types']):
+            position = bisect.bisect_left(self._starts, start)
+            if position < len(self._starts) and self._starts[position] == start:
+                continue
+            self._record(start, end, math.nan if energy is None else float(energy), type_name)
+        self.changed_since = changed_since
@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+"""Command line interface for the Eon Next API client.
+
+This drives `EonNext` directly, without Home Assistant, so bulk history pulls
+and load tests can run outside the HA event loop:
+
+    python -m custom_components.eon_next accounts
+    python -m custom_components.eon_next readings --since 2024-01-01
+    python -m custom_components.eon_next export --format csv --output readings.csv
+    python -m custom_components.eon_next bench --iterations 20
+    python -m custom_components.eon_next bench-memory --fleet 10,1000,10000
+    python -m custom_components.eon_next sync --store history/
+    python -m custom_components.eon_next query --store history/ --meter 12345678
+
+Credentials are read from --email/--password, then the EON_NEXT_EMAIL and
+EON_NEXT_PASSWORD environment variables, and finally prompted for.
+
+Any online command can record its API traffic, anonymised, with --record, and
+be run again offline against that recording with --replay:
+
+    python -m custom_components.eon_next --record session.jsonl bench --iterations 1
+    python -m custom_components.eon_next --replay session.jsonl --latency-scale 0 bench
+"""
+
+import argparse
+import asyncio
+import csv
+import datetime
+import getpass
+import logging
+import os
+import statistics
+import sys
+import time
+
+from .benchmark import FLEET_SIZES, measure_fleet
+from .eonnext import EonNext
+from .history import BACKEND_ARROW, BACKEND_FIXED_WIDTH, KINDS, KIND_READING, HistoryExporter, open_history_store
+from .transport import RecordingTransport, ReplayTransport
+
+_LOGGER = logging.getLogger(__name__)
+
+ENV_EMAIL = "EON_NEXT_EMAIL"
+ENV_PASSWORD = "EON_NEXT_PASSWORD"
+
+EXPORT_FORMAT_CSV = "csv"
+EXPORT_FORMAT_PARQUET = "parquet"
+EXPORT_COLUMNS = ["account_number", "meter_serial", "meter_type", "read_at", "value", "source"]
+EXPORT_BATCH_SIZE = 10000
+
+# Logins are matched on operation alone when replaying, so any credentials will do
+REPLAY_CREDENTIALS = ("replay@example.com", "replay")
+
+
+class CliError(Exception):
+    """Raised for user facing command line errors"""
+
+
+def _parse_since(value: str) -> datetime.datetime:
+    try:
+        parsed = datetime.datetime.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid date: {value}")
+
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=datetime.timezone.utc)
+    return parsed
+
+
+def _parse_sizes(value: str) -> list:
+    try:
+        return [int(size) for size in value.split(",")]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid fleet sizes: {value}")
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="eon_next", description="Eon Next API command line client")
+    parser.add_argument("--email", help=f"account email address (default: ${ENV_EMAIL})")
+    parser.add_argument("--password", help=f"account password (default: ${ENV_PASSWORD})")
+    parser.add_argument("--calorific-values", help="CSV of date,value gas calorific values in MJ/m3")
+    parser.add_argument("--max-concurrent", type=int, help="maximum API requests in flight")
+    parser.add_argument("-v", "--verbose", action="store_true", help="enable debug logging")
+    cassette = parser.add_mutually_exclusive_group()
+    cassette.add_argument("--record", metavar="PATH", help="append anonymised API traffic to this cassette")
+    cassette.add_argument("--replay", metavar="PATH", help="answer API requests from this cassette, offline")
+    parser.add_argument("--latency-scale", type=float, default=1.0, help="multiplier for replayed latency, 0 for none")
+
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("accounts", help="list accounts, meters and chargers")
+
+    readings = commands.add_parser("readings", help="print meter readings")
+    readings.add_argument("--since", type=_parse_since, help="only readings taken on or after this date")
+    readings.add_argument("--meter", help="only readings for this meter serial")
+
+    export = commands.add_parser("export", help="stream reading history to a file")
+    export.add_argument("--format", choices=[EXPORT_FORMAT_CSV, EXPORT_FORMAT_PARQUET], default=EXPORT_FORMAT_CSV)
+    export.add_argument("--output", required=True, help="file to write, or - for stdout (csv only)")
+    export.add_argument("--since", type=_parse_since, help="only readings taken on or after this date")
+    export.add_argument("--meter", help="only readings for this meter serial")
+    export.add_argument("--batch-size", type=int, default=EXPORT_BATCH_SIZE, help="rows buffered per write")
+
+    bench = commands.add_parser("bench", help="time repeated latest reading refreshes")
+    bench.add_argument("--iterations", type=int, default=10, help="refresh rounds to run")
+    bench.add_argument("--concurrency", type=int, default=4, help="maximum requests in flight")
+
+    bench_memory = commands.add_parser("bench-memory", help="measure model memory over synthetic fleets, offline")
+    bench_memory.add_argument("--fleet", type=_parse_sizes, default=FLEET_SIZES, help="comma separated meter counts")
+    bench_memory.add_argument("--max-bytes-per-meter", type=int, help="fail if the model uses more than this per meter")
+
+    sync = commands.add_parser("sync", help="append new reading history to a history store")
+    sync.add_argument("--store", required=True, help="history store directory")
+    sync.add_argument("--backend", choices=[BACKEND_ARROW, BACKEND_FIXED_WIDTH], help="store format (default: arrow if available)")
+    sync.add_argument("--since", type=_parse_since, help="earliest reading to fetch for meters not yet stored")
+
+    query = commands.add_parser("query", help="print a range of stored history without contacting the API")
+    query.add_argument("--store", required=True, help="history store directory")
+    query.add_argument("--backend", choices=[BACKEND_ARROW, BACKEND_FIXED_WIDTH], help="store format (default: arrow if available)")
+    query.add_argument("--meter", required=True, help="meter serial")
+    query.add_argument("--kind", choices=KINDS, default=KIND_READING)
+    query.add_argument("--start", type=_parse_since, help="first timestamp to include")
+    query.add_argument("--end", type=_parse_since, help="first timestamp to exclude")
+
+    return parser
+
+
+def _credentials(args) -> tuple:
+    if args.replay:
+        return args.email or REPLAY_CREDENTIALS[0], args.password or REPLAY_CREDENTIALS[1]
+
+    email = args.email or os.environ.get(ENV_EMAIL) or input("Email: ")
+    password = args.password or os.environ.get(ENV_PASSWORD) or getpass.getpass("Password: ")
+    return email, password
+
+
+async def _login(args) -> EonNext:
+    email, password = _credentials(args)
+
+    transport = None
+    if args.record:
+        transport = RecordingTransport(args.record)
+    elif args.replay:
+        try:
+            transport = ReplayTransport(args.replay, args.latency_scale)
+        except OSError as e:
+            raise CliError(f"Unable to read cassette: {e}")
+
+    api = EonNext(transport)
+    if args.max_concurrent:
+        api.scheduler.configure(max_concurrent=args.max_concurrent)
+
+    if await api.login_with_username_and_password(email, password) == False:
+        await api.close()
+        raise CliError("Authentication failed")
+
+    if args.calorific_values:
+        for account in api.accounts:
+            account.calorific_values.load_csv(args.calorific_values)
+    return api
+
+
+def _iter_meters(api: EonNext, serial: str = None):
+    for account in api.accounts:
+        for meter in account.meters:
+            if serial is None or meter.get_serial() == serial:
+                yield account, meter
+
+
+async def _iter_export_rows(api: EonNext, args):
+    for account, meter in _iter_meters(api, args.meter):
+        async for reading in meter.iter_readings(args.since):
+            yield [
+                account.account_number,
+                meter.get_serial(),
+                meter.get_type(),
+                reading.read_at.isoformat(),
+                reading.value,
+                reading.source
+            ]
+
+
+async def _cmd_accounts(api: EonNext, args) -> None:
+    for account in api.accounts:
+        print(f"Account {account.account_number} ({account.postcode})")
+        for meter in account.meters:
+            print(f"  {meter.get_type():<12} {meter.get_serial()}")
+        for charger in account.ev_chargers:
+            print(f"  {charger.get_type():<12} {charger.get_serial()} ({charger.meter_id})")
+
+
+async def _cmd_readings(api: EonNext, args) -> None:
+    writer = csv.writer(sys.stdout, delimiter="\t", lineterminator="\n")
+    async for row in _iter_export_rows(api, args):
+        writer.writerow(row[1:])
+
+
+async def _export_csv(rows, output: str) -> int:
+    count = 0
+    stream = sys.stdout if output == "-" else open(output, "w", newline="")
+    try:
+        writer = csv.writer(stream)
+        writer.writerow(EXPORT_COLUMNS)
+        async for row in rows:
+            writer.writerow(row)
+            count += 1
+    finally:
+        if stream is not sys.stdout:
+            stream.close()
+    return count
+
+
+async def _export_parquet(rows, output: str, batch_size: int) -> int:
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise CliError("Parquet export requires the pyarrow package")
+
+    if output == "-":
+        raise CliError("Parquet export cannot be written to stdout")
+
+    schema = pyarrow.schema([
+        ("account_number", pyarrow.string()),
+        ("meter_serial", pyarrow.string()),
+        ("meter_type", pyarrow.string()),
+        ("read_at", pyarrow.timestamp("s", tz="UTC")),
+        ("value", pyarrow.float64()),
+        ("source", pyarrow.string())
+    ])
+
+    def flush(writer, batch):
+        columns = list(zip(*batch))
+        columns[3] = [datetime.datetime.fromisoformat(value) for value in columns[3]]
+        writer.write_table(pyarrow.Table.from_arrays(
+            [pyarrow.array(column, type=field.type) for column, field in zip(columns, schema)],
+            schema=schema
+        ))
+
+    count = 0
+    batch = []
+    with pyarrow.parquet.ParquetWriter(output, schema) as writer:
+        async for row in rows:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                flush(writer, batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            flush(writer, batch)
+            count += len(batch)
+    return count
+
+
+async def _cmd_export(api: EonNext, args) -> None:
+    if args.batch_size < 1:
+        raise CliError("--batch-size must be at least 1")
+
+    rows = _iter_export_rows(api, args)
+    if args.format == EXPORT_FORMAT_PARQUET:
+        count = await _export_parquet(rows, args.output, args.batch_size)
+    else:
+        count = await _export_csv(rows, args.output)
+
+    print(f"Exported {count} readings", file=sys.stderr)
+
+
+async def _cmd_bench(api: EonNext, args) -> None:
+    meters = [meter for account, meter in _iter_meters(api)]
+    if len(meters) == 0:
+        raise CliError("No meters found to benchmark")
+
+    limit = asyncio.Semaphore(max(1, args.concurrency))
+    latencies = []
+
+    async def timed_refresh(meter):
+        async with limit:
+            started = time.perf_counter()
+            await meter._update()
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    for _ in range(args.iterations):
+        await asyncio.gather(*[timed_refresh(meter) for meter in meters])
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    print(f"requests:   {len(latencies)} across {len(meters)} meters")
+    print(f"elapsed:    {elapsed:.3f}s ({len(latencies) / elapsed:.2f} req/s)")
+    print(f"latency:    min {latencies[0] * 1000:.1f}ms  median {statistics.median(latencies) * 1000:.1f}ms  "
+          f"p95 {p95 * 1000:.1f}ms  max {latencies[-1] * 1000:.1f}ms")
+
+
+async def _cmd_bench_memory(api: EonNext, args) -> None:
+    print(f"{'meters':>8} {'resident':>12} {'model':>12} {'per meter':>10} {'refresh peak':>13} {'retained':>10}")
+    for size in args.fleet:
+        result = await measure_fleet(size)
+        resident = f"{result['resident_bytes'] / 1048576:.1f}MiB" if result['resident_bytes'] else "n/a"
+        print(
+            f"{result['meters']:>8} {resident:>12} {result['model_bytes'] / 1048576:>10.2f}MiB "
+            f"{result['model_bytes_per_meter']:>9.0f}B {result['refresh_peak_bytes'] / 1048576:>11.2f}MiB "
+            f"{result['refresh_retained_bytes']:>9}B"
+        )
+
+        if args.max_bytes_per_meter and result['model_bytes_per_meter'] > args.max_bytes_per_meter:
+            raise CliError(f"{result['model_bytes_per_meter']:.0f} bytes per meter exceeds the budget of {args.max_bytes_per_meter}")
+
+
+async def _cmd_sync(api: EonNext, args) -> None:
+    def show_progress(job):
+        print(f"{job.name}: {job.done}/{job.total} meters", file=sys.stderr)
+
+    store = open_history_store(args.store, args.backend)
+    try:
+        exporter = HistoryExporter(store)
+        job = api.scheduler.start_job("sync", lambda job: exporter.sync(api, args.since, job))
+        job.add_listener(show_progress)
+        written = await job.wait()
+    finally:
+        store.close()
+
+    print(f"Stored {written} new readings ({store.backend})", file=sys.stderr)
+
+
+async def _cmd_query(api: EonNext, args) -> None:
+    store = open_history_store(args.store, args.backend)
+    try:
+        records = store.query(args.meter, args.kind, args.start, args.end)
+        if store.backend == BACKEND_ARROW:
+            records = zip(records.column(0).to_pylist(), records.column(1).to_pylist())
+
+        writer = csv.writer(sys.stdout, delimiter="\t", lineterminator="\n")
+        for timestamp, value in records:
+            writer.writerow([datetime.datetime.fromtimestamp(timestamp, datetime.timezone.utc).isoformat(), value])
+        del records
+    finally:
+        store.close()
+
+
+COMMANDS = {
+    "accounts": _cmd_accounts,
+    "readings": _cmd_readings,
+    "export": _cmd_export,
+    "bench": _cmd_bench,
+    "bench-memory": _cmd_bench_memory,
+    "sync": _cmd_sync,
+    "query": _cmd_query
+}
+
+OFFLINE_COMMANDS = ["query", "bench-memory"]
+
+
+async def _run(args) -> None:
+    api = None
+    if args.command not in OFFLINE_COMMANDS:
+        api = await _login(args)
+    try:
+        await COMMANDS[args.command](api, args)
+    finally:
+        if api is not None:
+            await api.close()
+
+
+def main(argv: list = None) -> int:
+    args = _build_parser().parse_args(argv)
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.WARNING)
+
+    try:
+        asyncio.run(_run(args))
+    except CliError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        return 130
+    return 0
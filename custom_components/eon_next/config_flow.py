@@ -8,11 +8,28 @@ from typing import Any
 import voluptuous as vol
 
 from homeassistant import config_entries
+from homeassistant.core import callback
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
 import homeassistant.helpers.config_validation as cv
 
 from .eonnext import EonNext
-
-from . import DOMAIN, CONF_EMAIL, CONF_PASSWORD
+from .transport import AiohttpTransport
+
+from . import (
+    DOMAIN,
+    CONF_EMAIL,
+    CONF_PASSWORD,
+    CONF_READINGS_INTERVAL,
+    CONF_TARIFFS_INTERVAL,
+    CONF_DISPATCHES_INTERVAL,
+    CONF_SESSIONS_INTERVAL,
+    CONF_MAX_CONCURRENT_REQUESTS,
+    CONF_READINGS_CACHE_TTL,
+    CONF_DISPATCHES_CACHE_TTL,
+    CONF_TARIFFS_CACHE_TTL,
+    get_option,
+    store_session_handoff
+)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -26,13 +43,19 @@ class EonNextConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         pass
 
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry):
+        return EonNextOptionsFlow(config_entry)
+
+
     async def async_step_user(self, user_input=None):
         """Invoked when a user initiates a flow via the user interface."""
 
         errors = {}
         if user_input is not None:
 
-            en = EonNext()
+            en = EonNext(AiohttpTransport(session=async_get_clientsession(self.hass)))
             success = await en.login_with_username_and_password(
                 user_input[CONF_EMAIL],
                 user_input[CONF_PASSWORD],
@@ -41,6 +64,9 @@ class EonNextConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
             if success == True:
 
+                # Setup reuses this login instead of authenticating a second time
+                store_session_handoff(self.hass, user_input[CONF_EMAIL], en.export_session())
+
                 return self.async_create_entry(title="Eon Next", data={
                     CONF_EMAIL: user_input[CONF_EMAIL],
                     CONF_PASSWORD: user_input[CONF_PASSWORD]
@@ -53,3 +79,39 @@ class EonNextConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             vol.Required(CONF_EMAIL): cv.string,
             vol.Required(CONF_PASSWORD): cv.string
         }), errors=errors)
+
+
+
+# (option, minimum, maximum)
+OPTION_RANGES = [
+    (CONF_READINGS_INTERVAL, 10, 86400),
+    (CONF_TARIFFS_INTERVAL, 10, 86400),
+    (CONF_DISPATCHES_INTERVAL, 10, 86400),
+    (CONF_SESSIONS_INTERVAL, 10, 86400),
+    (CONF_MAX_CONCURRENT_REQUESTS, 1, 16),
+    (CONF_READINGS_CACHE_TTL, 0, 10080),
+    (CONF_DISPATCHES_CACHE_TTL, 0, 10080),
+    (CONF_TARIFFS_CACHE_TTL, 0, 10080)
+]
+
+
+class EonNextOptionsFlow(config_entries.OptionsFlow):
+    """Handle eon next performance tuning options."""
+
+    def __init__(self, config_entry):
+        # Kept under our own name, since older Home Assistant versions don't set `config_entry` on options flows
+        self._entry = config_entry
+
+
+    async def async_step_init(self, user_input=None):
+        """Polling, concurrency and caching options, applied without reloading the entry."""
+
+        if user_input is not None:
+            return self.async_create_entry(title="", data=user_input)
+
+        return self.async_show_form(step_id="init", data_schema=vol.Schema({
+            vol.Required(option, default=get_option(self._entry, option)): vol.All(
+                vol.Coerce(int), vol.Range(min=minimum, max=maximum)
+            )
+            for option, minimum, maximum in OPTION_RANGES
+        }))
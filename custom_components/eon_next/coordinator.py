@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+
+import logging
+from datetime import timedelta
+
+from homeassistant.const import UnitOfEnergy
+from homeassistant.helpers.storage import Store
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.util import slugify
+
+from . import (
+    DOMAIN,
+    DATA_COORDINATORS,
+    CONF_READINGS_INTERVAL,
+    CONF_TARIFFS_INTERVAL,
+    CONF_DISPATCHES_INTERVAL,
+    CONF_SESSIONS_INTERVAL,
+    get_option
+)
+from .eonnext import SUBSYSTEM_METERS, SUBSYSTEM_EV_CHARGERS, SUBSYSTEM_TARIFFS, SUBSYSTEM_SAVING_SESSIONS
+
+_LOGGER = logging.getLogger(__name__)
+
+DATA_READINGS = "readings"
+DATA_TARIFFS = "tariffs"
+DATA_DISPATCHES = "dispatches"
+DATA_SESSIONS = "sessions"
+
+CHARGING_HISTORY_STORAGE_VERSION = 1
+CHARGING_HISTORY_SAVE_DELAY = 60
+
+INTERVAL_OPTIONS = {
+    DATA_READINGS: CONF_READINGS_INTERVAL,
+    DATA_TARIFFS: CONF_TARIFFS_INTERVAL,
+    DATA_DISPATCHES: CONF_DISPATCHES_INTERVAL,
+    DATA_SESSIONS: CONF_SESSIONS_INTERVAL
+}
+
+
+async def _refresh_readings(account):
+    await account.ensure_loaded(SUBSYSTEM_METERS)
+    for meter in account.meters:
+        await meter.update()
+
+
+async def _refresh_tariffs(account):
+    if SUBSYSTEM_TARIFFS not in account.loaded_subsystems:
+        await account.ensure_loaded(SUBSYSTEM_TARIFFS)
+    else:
+        await account.update_tariff_data()
+
+
+async def _refresh_dispatches(account):
+    await account.ensure_loaded(SUBSYSTEM_EV_CHARGERS)
+    for charger in account.ev_chargers:
+        await charger.update()
+
+
+async def _refresh_sessions(account):
+    if SUBSYSTEM_SAVING_SESSIONS not in account.loaded_subsystems:
+        await account.ensure_loaded(SUBSYSTEM_SAVING_SESSIONS)
+    else:
+        await account._load_saving_sessions()
+
+
+REFRESH_METHODS = {
+    DATA_READINGS: _refresh_readings,
+    DATA_TARIFFS: _refresh_tariffs,
+    DATA_DISPATCHES: _refresh_dispatches,
+    DATA_SESSIONS: _refresh_sessions
+}
+
+
+class EonNextCoordinator(DataUpdateCoordinator):
+    """Refreshes one class of account data once per cycle, for every entity that uses it"""
+
+    def __init__(self, hass, entry, account, data_class: str):
+        super().__init__(
+            hass,
+            _LOGGER,
+            name=f"{DOMAIN} {account.account_number} {data_class}",
+            update_interval=timedelta(seconds=get_option(entry, INTERVAL_OPTIONS[data_class]))
+        )
+        self.account = account
+        self.data_class = data_class
+        self._history_store = None
+        if data_class == DATA_DISPATCHES:
+            self._history_store = Store(
+                hass,
+                CHARGING_HISTORY_STORAGE_VERSION,
+                f"{DOMAIN}.{entry.entry_id}.{account.account_number}.charging_history"
+            )
+        self._history_restored = False
+
+
+    def apply_options(self, entry) -> None:
+        self.update_interval = timedelta(seconds=get_option(entry, INTERVAL_OPTIONS[self.data_class]))
+
+
+    async def _async_update_data(self):
+        if self._history_store is not None and self._history_restored == False:
+            await self._restore_charging_history()
+
+        try:
+            await REFRESH_METHODS[self.data_class](self.account)
+        except Exception as e:
+            raise UpdateFailed(f"Unable to refresh {self.data_class} for account {self.account.account_number}: {e}") from e
+
+        if self._history_store is not None:
+            await self._record_charging_history()
+
+        return self.account
+
+
+    async def _restore_charging_history(self) -> None:
+        """Load saved dispatches before the first plan is observed, so newer records are never overwritten."""
+        saved = await self._history_store.async_load() or {}
+        for charger in self.account.ev_chargers:
+            if charger.get_serial() in saved:
+                charger.history.restore(saved[charger.get_serial()])
+        self._history_restored = True
+
+
+    async def _record_charging_history(self) -> None:
+        """Persist newly completed dispatches and add them to long-term statistics."""
+        changed = False
+        for charger in self.account.ev_chargers:
+            since = charger.history.take_changes()
+            if since is None:
+                continue
+            changed = True
+            if "recorder" in self.hass.config.components:
+                import_charging_statistics(self.hass, charger, since)
+
+        if changed == True:
+            self._history_store.async_delay_save(
+                lambda: {charger.get_serial(): charger.history.as_dict() for charger in self.account.ev_chargers},
+                CHARGING_HISTORY_SAVE_DELAY
+            )
+
+
+def charging_statistic_id(charger, cheap_rate_only: bool = False) -> str:
+    suffix = "cheap_rate_energy_added" if cheap_rate_only == True else "energy_added"
+    return f"{DOMAIN}:{slugify(charger.get_serial())}_{suffix}"
+
+
+def import_charging_statistics(hass, charger, since) -> None:
+    """Import hourly energy added by a charger, from the hour of `since` onwards.
+
+    Only those hours are spread again, the sum they continue from is the total of the hours before.
+    """
+    from homeassistant.components.recorder.statistics import async_add_external_statistics
+
+    for cheap_rate_only, label in [(False, "energy added"), (True, "cheap rate energy added")]:
+        statistics = []
+        total, hours = charger.history.hourly_energy(cheap_rate_only, since)
+        for hour, energy in hours:
+            total += energy
+            statistics.append({"start": hour, "state": energy, "sum": total})
+
+        if len(statistics) == 0:
+            continue
+
+        metadata = {
+            "has_mean": False,
+            "has_sum": True,
+            "name": f"{charger.get_serial()} Charging {label}",
+            "source": DOMAIN,
+            "statistic_id": charging_statistic_id(charger, cheap_rate_only),
+            "unit_of_measurement": UnitOfEnergy.KILO_WATT_HOUR
+        }
+        async_add_external_statistics(hass, metadata, statistics)
+
+
+def create_account_coordinators(hass, entry, account) -> dict:
+    return {
+        data_class: EonNextCoordinator(hass, entry, account, data_class)
+        for data_class in REFRESH_METHODS
+    }
+
+
+def register_coordinators(hass, entry, coordinators: list) -> None:
+    """Keep coordinators which have entities, so option changes and services reach them
+
+    Coordinators without entities are never registered, so nothing refreshes them
+    and loads the subsystem they would fetch.
+    """
+    hass.data[DOMAIN].setdefault(DATA_COORDINATORS, {}).setdefault(entry.entry_id, []).extend(coordinators)
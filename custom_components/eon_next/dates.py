@@ -0,0 +1,13 @@
+#!/usr/bin/env python3
+
+import datetime
+
+
+def parse_datetime(value: str) -> datetime.datetime:
+    """Parse an API timestamp, treating one without an offset as UTC"""
+    if not value:
+        return None
+    parsed = datetime.datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=datetime.timezone.utc)
+    return parsed
@@ -1,8 +1,18 @@
 #!/usr/bin/env python3
 
 import logging
-import aiohttp
+import copy
 import datetime
+import json
+from dataclasses import dataclass
+
+from .charging import ChargingHistory
+from .dates import parse_datetime
+from .gas import CalorificValueTable, GasEnergySeries
+from .profiling import span
+from .scheduler import PRIORITY_BULK, PRIORITY_INTERACTIVE, RequestScheduler
+from .sessions import SavingSessionIndex
+from .transport import AiohttpTransport
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -11,12 +21,86 @@ METER_TYPE_ELECTRIC = "electricity"
 METER_TYPE_EV = "ev"
 METER_TYPE_UNKNOWN = "unknown"
 
+SUBSYSTEM_METERS = "meters"
+SUBSYSTEM_EV_CHARGERS = "ev_chargers"
+SUBSYSTEM_TARIFFS = "tariffs"
+SUBSYSTEM_SAVING_SESSIONS = "saving_sessions"
+SUBSYSTEMS = [SUBSYSTEM_METERS, SUBSYSTEM_EV_CHARGERS, SUBSYSTEM_TARIFFS, SUBSYSTEM_SAVING_SESSIONS]
+
+READINGS_PAGE_SIZE = 12
+HISTORY_PAGE_SIZE = 100
+
+# Charging plans are fetched this often unless a TTL is configured, so that
+# completed dispatches are seen as they roll off the plan
+DEFAULT_DISPATCHES_CACHE_TTL = datetime.timedelta(minutes=5)
+
+RESPONSE_SNIPPET_LENGTH = 500
+
+
+@dataclass(frozen=True, slots=True)
+class MeterReading:
+    """A single register reading taken from a meter"""
+    read_at: datetime.datetime
+    value: float
+    source: str = None
+
+
+@dataclass(frozen=True, slots=True)
+class Tariff:
+    """Rates for an agreement, in pence"""
+    display_name: str = None
+    full_name: str = None
+    tariff_code: str = None
+    tariff_type: str = None
+    is_variable: bool = None
+    unit_rate: float = None
+    standing_charge: float = None
+    unit_rates: tuple = ()
+
+
+@dataclass(frozen=True, slots=True)
+class Agreement:
+    """A tariff agreement on an electricity meter point"""
+    id: str
+    mpan: str
+    tariff: Tariff
+    valid_from: datetime.datetime = None
+    valid_to: datetime.datetime = None
+
+    def is_active(self, now: datetime.datetime) -> bool:
+        return self.valid_to is None or self.valid_to > now
+
+
+@dataclass(frozen=True, slots=True)
+class Dispatch:
+    """A planned smart charging slot"""
+    start: datetime.datetime
+    end: datetime.datetime
+    type: str = None
+    energy_added_kwh: float = None
+
+    def as_dict(self) -> dict:
+        return {
+            "start": self.start.isoformat(),
+            "end": self.end.isoformat(),
+            "type": self.type,
+            "energyAddedKwh": self.energy_added_kwh
+        }
+
 
 class EonNext:
 
-    def __init__(self):
+    def __init__(self, transport=None):
         self.username = ""
         self.password = ""
+        # Carries requests to the API, swapped for a recording or replay in benchmarks
+        self.transport = transport if transport is not None else AiohttpTransport()
+        self.scheduler = RequestScheduler()
+        self.readings_cache_ttl = None
+        self.dispatches_cache_ttl = None
+        self.tariffs_cache_ttl = None
+        # Subsystems loaded for every account at login, the rest load on first use
+        self.initial_subsystems = list(SUBSYSTEMS)
         self.__reset_authentation()
         self.__reset_accounts()
     
@@ -89,7 +173,7 @@ class EonNext:
             if self.__refresh_token_is_valid() == True:
                 await self.__login_with_refresh_token()
             else:
-                await self.login_with_username_and_password()
+                await self.login_with_username_and_password(self.username, self.password, False)
         
         if self.__auth_token_is_valid() == False:
             raise Exception("Unable to authenticate")
@@ -97,30 +181,31 @@ class EonNext:
         return self.auth['token']['token']
     
 
-    async def _graphql_post(self, operation: str, query: str, variables: dict={}, authenticated: bool = True) -> dict:
-        use_headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-        }
+    async def _graphql_post(self, operation: str, query: str, variables: dict={}, authenticated: bool = True, priority: int = None) -> dict:
+        with span("graphql %s", operation):
+            use_headers = {
+                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+            }
+
+            if authenticated == True:
+                with span("auth"):
+                    use_headers['authorization'] = "JWT " + await self.__auth_token()
 
-        if authenticated == True:
-            use_headers['authorization'] = "JWT " + await self.__auth_token()
+            payload = {"operationName": operation, "variables": variables, "query": query}
+            _LOGGER.debug("GraphQL Payload: %s", payload)
 
-        payload = {"operationName": operation, "variables": variables, "query": query}
-        _LOGGER.debug(f"GraphQL Payload: {payload}")
+            async with self.scheduler.slot(priority):
+                with span("network"):
+                    status, body = await self.transport.post(operation, payload, use_headers)
 
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                "https://api.eonnext-kraken.energy/v1/graphql/",
-                json=payload,
-                headers=use_headers
-            ) as response:
+            with span("decode"):
                 try:
-                    json_data = await response.json()
-                    _LOGGER.debug(f"GraphQL Response for {operation}: {json_data}")
+                    json_data = json.loads(body)
+                    _LOGGER.debug("GraphQL Response for %s: %s", operation, json_data)
                     return json_data
                 except Exception as e:
-                    text = await response.text()
-                    _LOGGER.error(f"Failed to parse JSON response. Status: {response.status}. Body: {text}")
+                    snippet = bytes(body[:RESPONSE_SNIPPET_LENGTH]).decode("utf-8", errors="replace")
+                    _LOGGER.error(f"Failed to parse JSON response. Status: {status}. Length: {len(body)}. Body starts: {snippet}")
                     raise e
     
 
@@ -137,7 +222,8 @@ class EonNext:
                     "password": self.password
                 }
             },
-            False
+            False,
+            PRIORITY_INTERACTIVE
         )
 
         if self._json_contains_key_chain(result, ["data", "obtainKrakenToken", "token"]) == True:
@@ -164,7 +250,8 @@ class EonNext:
                     "refreshToken": self.auth['refresh']['token']
                 }
             },
-            False
+            False,
+            PRIORITY_INTERACTIVE
         )
 
         if self._json_contains_key_chain(result, ["data", "obtainKrakenToken", "token"]) == True:
@@ -177,8 +264,42 @@ class EonNext:
             return False
     
 
+    async def login_with_session(self, session: dict) -> bool:
+        """Resume a session exported by `export_session`, without logging in again"""
+        self.auth = copy.deepcopy(session['auth'])
+        if self.__auth_token_is_valid() == False and self.__refresh_token_is_valid() == False:
+            self.__reset_authentation()
+            return False
+
+        self.account_numbers = session.get('account_numbers')
+        await self.__init_accounts()
+        return True
+    
+
+    def export_session(self) -> dict:
+        """The current tokens and any discovered account numbers, for `login_with_session`"""
+        return {
+            "auth": copy.deepcopy(self.auth),
+            "account_numbers": self.account_numbers
+        }
+    
+
+    def invalidate_caches(self):
+        """Make the next refresh of every meter, charger and tariff fetch from the API"""
+        for account in self.accounts:
+            account.tariff_data_updated = None
+            for meter in account.meters + account.ev_chargers:
+                meter.last_updated = None
+
+
+    async def close(self):
+        """Release the transport's connections"""
+        await self.transport.close()
+
+
     def __reset_accounts(self):
         self.accounts = []
+        self.account_numbers = None
     
 
     async def __get_account_numbers(self) -> list:
@@ -194,18 +315,21 @@ class EonNext:
         for account_entry in result['data']['viewer']['accounts']:
             found.append(account_entry['number'])
 
+        self.account_numbers = found
         return found
     
 
     async def __init_accounts(self):
         if len(self.accounts) == 0:
-            for account_number in await self.__get_account_numbers():
+            account_numbers = self.account_numbers
+            if account_numbers is None:
+                account_numbers = await self.__get_account_numbers()
+
+            for account_number in account_numbers:
 
                 account = EnergyAccount(self, account_number)
-                await account._load_meters()
-                await account._load_ev_chargers()
-                await account._load_tariff_data()
-                await account._load_saving_sessions()
+                for subsystem in self.initial_subsystems:
+                    await account.ensure_loaded(subsystem)
 
                 self.accounts.append(account)
 
@@ -214,13 +338,58 @@ class EonNext:
 
 class EnergyAccount:
 
+    __slots__ = (
+        "api",
+        "account_number",
+        "loaded_subsystems",
+        "meters",
+        "ev_chargers",
+        "tariff_data",
+        "tariff_data_updated",
+        "saving_sessions",
+        "postcode",
+        "calorific_values"
+    )
+
     def __init__(self, api: EonNext, account_number: str):
         self.api = api
         self.account_number = account_number
+        self.loaded_subsystems = set()
+        self.meters = []
         self.ev_chargers = []
         self.tariff_data = None
-        self.saving_sessions = []
+        self.tariff_data_updated = None
+        self.saving_sessions = SavingSessionIndex()
         self.postcode = ""
+        self.calorific_values = CalorificValueTable()
+    
+
+    async def ensure_loaded(self, subsystem: str):
+        """Load a subsystem for this account the first time it is needed"""
+        if subsystem in self.loaded_subsystems:
+            return
+
+        if subsystem == SUBSYSTEM_SAVING_SESSIONS:
+            # Saving sessions are looked up by the postcode found with the meters
+            await self.ensure_loaded(SUBSYSTEM_METERS)
+
+        loaders = {
+            SUBSYSTEM_METERS: self._load_meters,
+            SUBSYSTEM_EV_CHARGERS: self._load_ev_chargers,
+            SUBSYSTEM_TARIFFS: self._load_tariff_data,
+            SUBSYSTEM_SAVING_SESSIONS: self._load_saving_sessions
+        }
+        await loaders[subsystem]()
+        self.loaded_subsystems.add(subsystem)
+    
+
+    async def update_tariff_data(self):
+        """Reload tariff data unless it is still within the API's tariff cache TTL"""
+        ttl = self.api.tariffs_cache_ttl
+        if ttl is not None and self.tariff_data_updated is not None:
+            if datetime.datetime.now() - self.tariff_data_updated < ttl:
+                return
+        await self._load_tariff_data()
     
 
     async def _load_tariff_data(self):
@@ -233,7 +402,7 @@ class EnergyAccount:
             }
         )
         
-        self.tariff_data = []
+        tariff_data = []
         if self.api._json_contains_key_chain(result, ["data", "properties"]):
             for prop in result['data']['properties']:
                 if 'electricityMeterPoints' in prop:
@@ -241,25 +410,56 @@ class EnergyAccount:
                         mpan = point.get('mpan')
                         if 'agreements' in point:
                             for agreement in point['agreements']:
-                                # Inject meterPoint info for sensor compatibility
-                                agreement['meterPoint'] = {'mpan': mpan}
-                                self.tariff_data.append(agreement)
+                                tariff_data.append(self._parse_agreement(agreement, mpan))
+        self.tariff_data = tariff_data
+        self.tariff_data_updated = datetime.datetime.now()
+    
+
+    def _parse_agreement(self, agreement: dict, mpan: str) -> Agreement:
+        tariff = agreement.get('tariff') or {}
+        return Agreement(
+            id=agreement.get('id'),
+            mpan=mpan,
+            valid_from=parse_datetime(agreement.get('validFrom')),
+            valid_to=parse_datetime(agreement.get('validTo')),
+            tariff=Tariff(
+                display_name=tariff.get('displayName'),
+                full_name=tariff.get('fullName'),
+                tariff_code=tariff.get('tariffCode'),
+                tariff_type=tariff.get('tariffType'),
+                is_variable=tariff.get('isVariable'),
+                unit_rate=tariff.get('unitRate'),
+                standing_charge=tariff.get('standingCharge'),
+                unit_rates=tuple(rate['value'] for rate in tariff.get('unitRates') or [])
+            )
+        )
+    
+
+    def get_active_agreement(self, now: datetime.datetime = None) -> Agreement:
+        """The first agreement on the account which has not yet ended"""
+        if now is None:
+            now = datetime.datetime.now(datetime.timezone.utc)
+
+        for agreement in self.tariff_data or []:
+            if agreement.is_active(now):
+                return agreement
+        return None
     
 
     async def _load_saving_sessions(self):
         """Load saving session data (similar to Octopus Saving Sessions)"""
         result = await self.api._graphql_post(
             "getSavingSessions",
-            "query getSavingSessions($postcode: String!) { appSessions(postcode: $postcode) { edges { node { id startedAt __typename } } } }",
+            "query getSavingSessions($postcode: String!) { appSessions(postcode: $postcode) { edges { node { id startedAt endedAt __typename } } } }",
             {
                 "postcode": self.postcode
             }
         )
         
         if self.api._json_contains_key_chain(result, ["data", "appSessions", "edges"]):
-            self.saving_sessions = [edge['node'] for edge in result['data']['appSessions']['edges']]
+            self.saving_sessions.update([edge['node'] for edge in result['data']['appSessions']['edges']])
         else:
-            self.saving_sessions = []
+            self.saving_sessions.update([])
     
 
     async def _load_ev_chargers(self):
@@ -313,6 +513,20 @@ class EnergyAccount:
 
 class EnergyMeter:
 
+    __slots__ = (
+        "account",
+        "api",
+        "last_updated",
+        "type",
+        "meter_id",
+        "serial",
+        "latest_reading",
+        "latest_reading_date"
+    )
+
+    _readings_operation = None
+    _readings_query = None
+
     def __init__(self, account: EnergyAccount, meter_id: str, serial: str):
         self.account = account
         self.api = account.api
@@ -335,11 +549,19 @@ class EnergyMeter:
         return self.serial
     
 
+    def _cache_ttl(self) -> datetime.timedelta:
+        return self.api.readings_cache_ttl
+    
+
     def _should_update(self) -> bool:
         if self.last_updated == None:
             return True
         
         now = datetime.datetime.now()
+        ttl = self._cache_ttl()
+        if ttl is not None:
+            return now - self.last_updated >= ttl
+
         if now.strftime("%d") != self.last_updated.strftime("%d"):
             if now.hour >= 7:
                 return True
@@ -347,15 +569,71 @@ class EnergyMeter:
         return False
 
 
-    def _convert_datetime_str_to_date(self, datetime_str: str) -> datetime.date:
-        date_chunks = str(datetime_str.split("T")[0]).split("-")
-        return datetime.date(int(date_chunks[0]), int(date_chunks[1]), int(date_chunks[2]))
-    
+    def _parse_reading(self, node: dict) -> MeterReading:
+        return MeterReading(
+            read_at=parse_datetime(node['readAt']),
+            value=float(node['registers'][0]['value']),
+            source=node.get('source')
+        )
+
+
+    async def _load_readings_page(self, cursor: str = "", first: int = READINGS_PAGE_SIZE, priority: int = PRIORITY_INTERACTIVE) -> dict:
+        result = await self.api._graphql_post(
+            self._readings_operation,
+            self._readings_query,
+            {
+                "accountNumber": self.account.account_number,
+                "cursor": cursor,
+                "first": first,
+                "meterId": self.meter_id
+            },
+            priority=priority
+        )
+
+        if self.api._json_contains_key_chain(result, ["data", "readings"]) == False:
+            raise Exception("Unable to load readings for meter " + self.serial)
+
+        return result['data']['readings']
+
 
     async def _update(self):
+        if self._readings_operation is None:
+            return
+
+        readings = [self._parse_reading(edge['node']) for edge in (await self._load_readings_page())['edges']]
+        if len(readings) > 0:
+            self.latest_reading = round(readings[0].value)
+            self.latest_reading_date = readings[0].read_at.date()
+            self._add_readings(readings)
+            self.last_updated = datetime.datetime.now()
+
+
+    def _add_readings(self, readings: list) -> None:
+        """Hook for meters which keep more than the latest of each page of readings, newest first"""
         pass
 
 
+    async def iter_readings(self, since: datetime.datetime = None, page_size: int = HISTORY_PAGE_SIZE):
+        """Yield readings newest first, one page at a time, stopping before `since`."""
+        if self._readings_operation is None:
+            return
+
+        cursor = ""
+        while True:
+            page = await self._load_readings_page(cursor, page_size, PRIORITY_BULK)
+
+            for edge in page['edges']:
+                reading = self._parse_reading(edge['node'])
+                if since is not None and reading.read_at < since:
+                    return
+                yield reading
+
+            page_info = page.get('pageInfo') or {}
+            if page_info.get('hasNextPage') != True or not page_info.get('endCursor'):
+                return
+            cursor = page_info['endCursor']
+
+
     async def update(self):
         if self._should_update() == True:
             await self._update()
@@ -381,78 +659,79 @@ class EnergyMeter:
 
 class ElectricityMeter(EnergyMeter):
 
+    __slots__ = ()
+
+    _readings_operation = "meterReadingsHistoryTableElectricityReadings"
+    _readings_query = "query meterReadingsHistoryTableElectricityReadings($accountNumber: String!, $cursor: String, $first: Int, $meterId: String!) {\n  readings: electricityMeterReadings(\n    accountNumber: $accountNumber\n    after: $cursor\n    first: $first\n    meterId: $meterId\n  ) {\n    edges {\n      ...MeterReadingsHistoryTableElectricityMeterReadingConnectionTypeEdge\n      __typename\n    }\n    pageInfo {\n      endCursor\n      hasNextPage\n      __typename\n    }\n    __typename\n  }\n}\n\nfragment MeterReadingsHistoryTableElectricityMeterReadingConnectionTypeEdge on ElectricityMeterReadingConnectionTypeEdge {\n  node {\n    id\n    readAt\n    readingSource\n    registers {\n      name\n      value\n      __typename\n    }\n    source\n    __typename\n  }\n  __typename\n}\n"
+
     def __init__(self, account: EnergyAccount, meter_id: str, serial: str):
         super().__init__(account, meter_id, serial)
         self.type = METER_TYPE_ELECTRIC
-    
 
-    async def _update(self):
-        result = await self.api._graphql_post(
-            "meterReadingsHistoryTableElectricityReadings",
-            "query meterReadingsHistoryTableElectricityReadings($accountNumber: String!, $cursor: String, $meterId: String!) {\n  readings: electricityMeterReadings(\n    accountNumber: $accountNumber\n    after: $cursor\n    first: 12\n    meterId: $meterId\n  ) {\n    edges {\n      ...MeterReadingsHistoryTableElectricityMeterReadingConnectionTypeEdge\n      __typename\n    }\n    pageInfo {\n      endCursor\n      hasNextPage\n      __typename\n    }\n    __typename\n  }\n}\n\nfragment MeterReadingsHistoryTableElectricityMeterReadingConnectionTypeEdge on ElectricityMeterReadingConnectionTypeEdge {\n  node {\n    id\n    readAt\n    readingSource\n    registers {\n      name\n      value\n      __typename\n    }\n    source\n    __typename\n  }\n  __typename\n}\n",
-            {
-                "accountNumber": self.account.account_number,
-                "cursor": "",
-                "meterId": self.meter_id
-            }
-        )
-
-        if self.api._json_contains_key_chain(result, ["data", "readings"]) == False:
-            raise Exception("Unable to load readings for meter " + self.serial)
 
-        readings = result['data']['readings']['edges']
-        if len(readings) > 0:
-            self.latest_reading = round(float(readings[0]['node']['registers'][0]['value']))
-            self.latest_reading_date = self._convert_datetime_str_to_date(readings[0]['node']['readAt'])
-            self.last_updated = datetime.datetime.now()
 
+class GasMeter(EnergyMeter):
 
+    __slots__ = ("energy",)
 
-class GasMeter(EnergyMeter):
+    _readings_operation = "meterReadingsHistoryTableGasReadings"
+    _readings_query = "query meterReadingsHistoryTableGasReadings($accountNumber: String!, $cursor: String, $first: Int, $meterId: String!) {\n  readings: gasMeterReadings(\n    accountNumber: $accountNumber\n    after: $cursor\n    first: $first\n    meterId: $meterId\n  ) {\n    edges {\n      ...MeterReadingsHistoryTableGasMeterReadingConnectionTypeEdge\n      __typename\n    }\n    pageInfo {\n      endCursor\n      hasNextPage\n      __typename\n    }\n    __typename\n  }\n}\n\nfragment MeterReadingsHistoryTableGasMeterReadingConnectionTypeEdge on GasMeterReadingConnectionTypeEdge {\n  node {\n    id\n    readAt\n    readingSource\n    registers {\n      name\n      value\n      __typename\n    }\n    source\n    __typename\n  }\n  __typename\n}\n"
 
     def __init__(self, account: EnergyAccount, meter_id: str, serial: str):
         super().__init__(account, meter_id, serial)
         self.type = METER_TYPE_GAS
+        self.energy = GasEnergySeries()
     
 
-    async def _update(self):
-        result = await self.api._graphql_post(
-            "meterReadingsHistoryTableGasReadings",
-            "query meterReadingsHistoryTableGasReadings($accountNumber: String!, $cursor: String, $meterId: String!) {\n  readings: gasMeterReadings(\n    accountNumber: $accountNumber\n    after: $cursor\n    first: 12\n    meterId: $meterId\n  ) {\n    edges {\n      ...MeterReadingsHistoryTableGasMeterReadingConnectionTypeEdge\n      __typename\n    }\n    pageInfo {\n      endCursor\n      hasNextPage\n      __typename\n    }\n    __typename\n  }\n}\n\nfragment MeterReadingsHistoryTableGasMeterReadingConnectionTypeEdge on GasMeterReadingConnectionTypeEdge {\n  node {\n    id\n    readAt\n    readingSource\n    registers {\n      name\n      value\n      __typename\n    }\n    source\n    __typename\n  }\n  __typename\n}\n",
-            {
-                "accountNumber": self.account.account_number,
-                "cursor": "",
-                "meterId": self.meter_id
-            }
-        )
+    def convert_m3_to_kwh(self, m3: float, day: datetime.date = None) -> int:
+        if m3 is None:
+            return None
 
-        if self.api._json_contains_key_chain(result, ["data", "readings"]) == False:
-            raise Exception("Unable to load readings for meter " + self.serial)
+        if day is None:
+            day = datetime.date.today()
 
-        readings = result['data']['readings']['edges']
-        if len(readings) > 0:
-            self.latest_reading = round(float(readings[0]['node']['registers'][0]['value']))
-            self.latest_reading_date = self._convert_datetime_str_to_date(readings[0]['node']['readAt'])
-            self.last_updated = datetime.datetime.now()
+        return round(self.account.calorific_values.convert(m3, day))
     
 
-    async def get_latest_reading_kwh(self) -> int:
-        m3 = await self.get_latest_reading()
-        gas_caloric_value = 38
+    def _add_readings(self, readings: list) -> None:
+        self.energy.add_readings(
+            [(int(reading.read_at.timestamp()), reading.value) for reading in reversed(readings)],
+            self.account.calorific_values
+        )
+
 
-        kwh = m3 * 1.02264
-        kwh = kwh * gas_caloric_value
-        kwh = kwh / 3.6
+    def restore_kwh(self, read_at: datetime.datetime, m3: float, kwh: float) -> None:
+        """Continue the running kWh total from one saved before a restart"""
+        self.energy.restore(int(read_at.timestamp()), m3, kwh)
 
-        return round(kwh)
+
+    def get_cached_latest_reading_kwh(self) -> float:
+        """Running kWh total, each interval converted with the calorific value of its day"""
+        total = self.energy.total_kwh(self.account.calorific_values)
+        if total is None:
+            return None
+        return round(total, 3)
+    
+
+    async def get_latest_reading_kwh(self) -> float:
+        await self.update()
+        return self.get_cached_latest_reading_kwh()
 
 
 class SmartCharging(EnergyMeter):
 
+    __slots__ = ("schedule", "history")
+
     def __init__(self, account: EnergyAccount, meter_id: str, serial: str):
         super().__init__(account, meter_id, serial)
         self.type = METER_TYPE_EV
         self.schedule = None
+        # Dispatches are kept here once they finish, as the plan forgets them
+        self.history = ChargingHistory()
+    
+
+    def _cache_ttl(self) -> datetime.timedelta:
+        return self.api.dispatches_cache_ttl or DEFAULT_DISPATCHES_CACHE_TTL
     
 
     async def _update(self):
@@ -461,11 +740,21 @@ class SmartCharging(EnergyMeter):
             "query getSmartChargingSchedule($deviceId: String!) {\n  flexPlannedDispatches(deviceId: $deviceId) {\n    start\n    end\n    type\n    energyAddedKwh\n  }\n}\n",
             {
                 "deviceId": self.meter_id
-            }
+            },
+            priority=PRIORITY_INTERACTIVE
         )
 
         if self.api._json_contains_key_chain(result, ["data", "flexPlannedDispatches"]) == True:
-            self.schedule = result['data']['flexPlannedDispatches']
+            self.schedule = tuple(
+                Dispatch(
+                    start=parse_datetime(dispatch['start']),
+                    end=parse_datetime(dispatch['end']),
+                    type=dispatch.get('type'),
+                    energy_added_kwh=dispatch.get('energyAddedKwh')
+                )
+                for dispatch in result['data']['flexPlannedDispatches']
+            )
+            self.history.observe(self.schedule, datetime.datetime.now(datetime.timezone.utc))
             self.last_updated = datetime.datetime.now()
 
     async def get_schedule(self):
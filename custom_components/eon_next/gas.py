@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""Gas volume to energy conversion using daily calorific values.
+
+kWh = m3 x volume correction x calorific value (MJ/m3) / 3.6
+
+Calorific values vary by day and by local distribution zone, so they are kept
+in a date indexed table. A day without a published value uses the most recent
+earlier one, and the standard value is used before the first entry.
+"""
+
+import array
+import bisect
+import csv
+import datetime
+import logging
+
+_LOGGER = logging.getLogger(__name__)
+
+VOLUME_CORRECTION_FACTOR = 1.02264
+DEFAULT_CALORIFIC_VALUE = 38
+MEGAJOULES_PER_KWH = 3.6
+
+# Calorific values this old are taken as final, and the intervals they convert are folded into the running total
+FINAL_AFTER = datetime.timedelta(days=90)
+
+
+def _as_date(value) -> datetime.date:
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    if isinstance(value, datetime.date):
+        return value
+    return datetime.date.fromisoformat(str(value)[:10])
+
+
+def read_calorific_values_csv(path: str) -> dict:
+    """Read a `date,value` CSV file to {date: value}, ignoring a header row and blank lines"""
+    values = {}
+    with open(path, newline="") as handle:
+        for row in csv.reader(handle):
+            if len(row) < 2:
+                continue
+            try:
+                values[_as_date(row[0].strip())] = float(row[1])
+            except ValueError:
+                continue
+    return values
+
+
+class CalorificValueTable:
+    """Daily calorific values in MJ/m3, indexed by date"""
+
+    def __init__(self, default: float = DEFAULT_CALORIFIC_VALUE):
+        self.default = default
+        self.dates = []
+        self.values = []
+        self.version = 0
+
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+
+    def update(self, values: dict) -> None:
+        """Merge in {date: calorific value}, replacing any existing days"""
+        if not values:
+            return
+
+        merged = dict(zip(self.dates, self.values))
+        for day, value in values.items():
+            merged[_as_date(day)] = float(value)
+        self._store(merged)
+
+
+    def replace(self, values: dict) -> None:
+        """Replace every value with {date: calorific value}"""
+        self._store({_as_date(day): float(value) for day, value in values.items()})
+
+
+    def _store(self, merged: dict) -> None:
+        self.dates = sorted(merged)
+        self.values = [merged[day] for day in self.dates]
+        self.version += 1
+
+
+    def load_csv(self, path: str) -> None:
+        self.update(read_calorific_values_csv(path))
+
+
+    def value_for(self, day) -> float:
+        index = bisect.bisect_right(self.dates, _as_date(day)) - 1
+        if index < 0:
+            return self.default
+        return self.values[index]
+
+
+    def kwh_per_m3(self, day) -> float:
+        return VOLUME_CORRECTION_FACTOR * self.value_for(day) / MEGAJOULES_PER_KWH
+
+
+    def convert(self, m3: float, day) -> float:
+        return m3 * self.kwh_per_m3(day)
+
+
+    def convert_series(self, series) -> list:
+        """Convert time ordered (timestamp, m3) pairs to (timestamp, kWh) in a single merge pass"""
+        converted = []
+        index = -1
+        next_date = self.dates[0] if self.dates else None
+        factor = VOLUME_CORRECTION_FACTOR * self.default / MEGAJOULES_PER_KWH
+
+        for timestamp, m3 in series:
+            day = _as_date(timestamp if not isinstance(timestamp, (int, float)) else
+                           datetime.datetime.fromtimestamp(timestamp, datetime.timezone.utc))
+
+            if index >= 0 and day < self.dates[index]:
+                # Out of order input, fall back to a lookup for this entry
+                converted.append((timestamp, m3 * self.kwh_per_m3(day)))
+                continue
+
+            while next_date is not None and next_date <= day:
+                index += 1
+                factor = VOLUME_CORRECTION_FACTOR * self.values[index] / MEGAJOULES_PER_KWH
+                next_date = self.dates[index + 1] if index + 1 < len(self.dates) else None
+
+            converted.append((timestamp, m3 * factor))
+
+        return converted
+
+
+
+class GasEnergySeries:
+    """Running kWh total of a gas meter, each interval converted with its own day's calorific value
+
+    The total starts from an anchor reading whose kWh is known: the first reading
+    seen, converted whole, or a total restored from before a restart. Later
+    readings add their consumption since the one before. A change of calorific
+    values therefore only changes the intervals on the days it covers.
+    """
+
+    def __init__(self):
+        self._timestamps = array.array("q")
+        self._m3 = array.array("d")
+        self._anchor_kwh = None
+        self._cache_key = None
+        self._kwh_series = []
+        self._total = None
+
+
+    def __len__(self) -> int:
+        return len(self._timestamps)
+
+
+    def add_readings(self, readings, table: CalorificValueTable) -> bool:
+        """Add time ordered (timestamp, m3 register) readings newer than the last, returning whether any were"""
+        added = False
+        for timestamp, m3 in readings:
+            if len(self._timestamps) > 0 and timestamp <= self._timestamps[-1]:
+                continue
+            if self._anchor_kwh is None:
+                self._anchor_kwh = table.convert(m3, datetime.datetime.fromtimestamp(timestamp, datetime.timezone.utc))
+            self._timestamps.append(timestamp)
+            self._m3.append(m3)
+            added = True
+
+        if added:
+            self._fold(table)
+        return added
+
+
+    def latest(self) -> tuple:
+        """(timestamp, m3 register) of the newest reading, None before the first"""
+        if len(self._timestamps) == 0:
+            return None
+        return self._timestamps[-1], self._m3[-1]
+
+
+    def restore(self, timestamp: int, m3: float, kwh: float) -> None:
+        """Anchor the total at a reading whose kWh is known, keeping any readings after it"""
+        keep = bisect.bisect_right(self._timestamps, timestamp)
+        self._timestamps = array.array("q", [timestamp]) + self._timestamps[keep:]
+        self._m3 = array.array("d", [m3]) + self._m3[keep:]
+        self._anchor_kwh = kwh
+        self._cache_key = None
+
+
+    def consumption(self) -> list:
+        """(timestamp, m3 used since the previous reading) for each reading after the anchor"""
+        consumption = []
+        for index in range(1, len(self._timestamps)):
+            used = self._m3[index] - self._m3[index - 1]
+            # A drop in the register means a meter exchange or reset, not negative use
+            if used >= 0:
+                consumption.append((self._timestamps[index], used))
+        return consumption
+
+
+    def kwh_series(self, table: CalorificValueTable) -> list:
+        """(timestamp, kWh) consumption after the anchor, converted again only when readings or values change"""
+        key = (len(self._timestamps), self._timestamps[0] if self._timestamps else None, self._anchor_kwh, table.version)
+        if key != self._cache_key:
+            self._kwh_series = table.convert_series(self.consumption())
+            self._total = None if self._anchor_kwh is None else self._anchor_kwh + sum(kwh for timestamp, kwh in self._kwh_series)
+            self._cache_key = key
+        return self._kwh_series
+
+
+    def total_kwh(self, table: CalorificValueTable) -> float:
+        self.kwh_series(table)
+        return self._total
+
+
+    def _fold(self, table: CalorificValueTable) -> None:
+        """Fold readings whose calorific values are final into the anchor, so the series stays short"""
+        cutoff = int((datetime.datetime.now(datetime.timezone.utc) - FINAL_AFTER).timestamp())
+        last_final = bisect.bisect_right(self._timestamps, cutoff) - 1
+        if last_final <= 0:
+            return
+
+        folded = [
+            (self._timestamps[index], self._m3[index] - self._m3[index - 1])
+            for index in range(1, last_final + 1)
+            if self._m3[index] >= self._m3[index - 1]
+        ]
+        self._anchor_kwh += sum(kwh for timestamp, kwh in table.convert_series(folded))
+        del self._timestamps[:last_final]
+        del self._m3[:last_final]
+        self._cache_key = None
@@ -0,0 +1,436 @@
+#!/usr/bin/env python3
+"""Append-only columnar storage of meter reading and consumption history.
+
+Each meter gets its own time-ordered series per record kind. Records are only
+ever appended, and only when newer than the last stored timestamp, so repeated
+syncs are incremental and idempotent. Range queries binary search the series
+by timestamp and hand back views over memory-mapped data rather than copies.
+
+Apache Arrow IPC segments are used when pyarrow is installed, otherwise a
+fixed-width binary record file per series.
+"""
+
+import bisect
+import datetime
+import logging
+import mmap
+import os
+import re
+import struct
+import tempfile
+
+from .eonnext import METER_TYPE_GAS
+
+_LOGGER = logging.getLogger(__name__)
+
+KIND_READING = "reading"
+KIND_CONSUMPTION = "consumption"
+KIND_CONSUMPTION_KWH = "consumption_kwh"
+KINDS = [KIND_READING, KIND_CONSUMPTION, KIND_CONSUMPTION_KWH]
+
+BACKEND_ARROW = "arrow"
+BACKEND_FIXED_WIDTH = "fixed_width"
+
+# Arrow series are merged back into one segment once an append leaves more than this
+MAX_ARROW_SEGMENTS = 16
+
+# Readings arrive newest first, so a sync spills them to disk and appends them oldest first in batches this size
+SYNC_BATCH_SIZE = 10000
+SPILL_RECORD = struct.Struct("<qd")
+
+
+def _safe_name(value: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", str(value))
+
+
+def _to_timestamp(value) -> int:
+    if value is None:
+        return None
+    if isinstance(value, datetime.datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=datetime.timezone.utc)
+        return int(value.timestamp())
+    return int(value)
+
+
+def _prepare_records(records, after: int) -> list:
+    """Sort records by timestamp, dropping duplicates and anything not after `after`"""
+    prepared = []
+    for timestamp, value in sorted((_to_timestamp(record[0]), record[1]) for record in records):
+        if after is not None and timestamp <= after:
+            continue
+        if prepared and prepared[-1][0] == timestamp:
+            continue
+        prepared.append((timestamp, float(value)))
+    return prepared
+
+
+class _Timestamps:
+    """Sequence view of the timestamp column of a fixed-width record buffer, for bisect"""
+
+    def __init__(self, buffer, record: struct.Struct, count: int):
+        self.buffer = buffer
+        self.record = record
+        self.count = count
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, index: int) -> int:
+        return self.record.unpack_from(self.buffer, index * self.record.size)[0]
+
+
+class RecordRange:
+    """Zero-copy view over a run of fixed-width (timestamp, value) records"""
+
+    def __init__(self, view: memoryview, record: struct.Struct):
+        self.view = view
+        self.record = record
+
+    def __len__(self) -> int:
+        return len(self.view) // self.record.size
+
+    def __iter__(self):
+        return self.record.iter_unpack(self.view)
+
+    def timestamps(self) -> list:
+        return [timestamp for timestamp, value in self]
+
+    def values(self) -> list:
+        return [value for timestamp, value in self]
+
+
+class FixedWidthHistoryStore:
+    """History store writing packed little-endian (int64 timestamp, float64 value) records"""
+
+    backend = BACKEND_FIXED_WIDTH
+    RECORD = struct.Struct("<qd")
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._maps = {}
+        os.makedirs(directory, exist_ok=True)
+
+
+    def _path(self, meter: str, kind: str) -> str:
+        return os.path.join(self.directory, f"{_safe_name(meter)}.{kind}.rec")
+
+
+    def _map(self, path: str):
+        if path not in self._maps:
+            if not os.path.exists(path) or os.path.getsize(path) < self.RECORD.size:
+                return None
+            with open(path, "rb") as handle:
+                self._maps[path] = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._maps[path]
+
+
+    def last_timestamp(self, meter: str, kind: str = KIND_READING) -> int:
+        path = self._path(meter, kind)
+        if not os.path.exists(path):
+            return None
+
+        size = os.path.getsize(path) - (os.path.getsize(path) % self.RECORD.size)
+        if size == 0:
+            return None
+
+        with open(path, "rb") as handle:
+            handle.seek(size - self.RECORD.size)
+            return self.RECORD.unpack(handle.read(self.RECORD.size))[0]
+
+
+    def last_record(self, meter: str, kind: str = KIND_READING) -> tuple:
+        records = self.query(meter, kind)
+        if len(records) == 0:
+            return None
+        return self.RECORD.unpack_from(records.view, len(records.view) - self.RECORD.size)
+
+
+    def append(self, meter: str, kind: str, records) -> int:
+        """Append records newer than the last stored one, returning how many were written"""
+        prepared = _prepare_records(records, self.last_timestamp(meter, kind))
+        if len(prepared) == 0:
+            return 0
+
+        path = self._path(meter, kind)
+        with open(path, "ab") as handle:
+            # Drop any torn record left by an interrupted write
+            handle.truncate(handle.tell() - (handle.tell() % self.RECORD.size))
+            handle.write(b"".join(self.RECORD.pack(*record) for record in prepared))
+
+        # Existing views keep the old mapping alive until they are released
+        self._maps.pop(path, None)
+        return len(prepared)
+
+
+    def query(self, meter: str, kind: str = KIND_READING, start=None, end=None) -> RecordRange:
+        """Records with start <= timestamp < end, as a view over the mapped file"""
+        mapped = self._map(self._path(meter, kind))
+        if mapped is None:
+            return RecordRange(memoryview(b""), self.RECORD)
+
+        count = len(mapped) // self.RECORD.size
+        timestamps = _Timestamps(mapped, self.RECORD, count)
+        first = 0 if start is None else bisect.bisect_left(timestamps, _to_timestamp(start))
+        last = count if end is None else bisect.bisect_left(timestamps, _to_timestamp(end))
+
+        view = memoryview(mapped)[first * self.RECORD.size:max(first, last) * self.RECORD.size]
+        return RecordRange(view, self.RECORD)
+
+
+    def close(self):
+        for mapped in self._maps.values():
+            try:
+                mapped.close()
+            except BufferError:
+                # Still referenced by a live RecordRange, it is closed when released
+                pass
+        self._maps = {}
+
+
+
+class ArrowHistoryStore:
+    """History store writing Arrow IPC segment files, one per append
+
+    Segments are compacted into one when there are more than `MAX_ARROW_SEGMENTS`,
+    so the number of files read by a query stays bounded however often it syncs.
+    """
+
+    backend = BACKEND_ARROW
+
+    def __init__(self, directory: str):
+        import pyarrow
+        import pyarrow.ipc
+
+        self.pyarrow = pyarrow
+        self.directory = directory
+        self.schema = pyarrow.schema([
+            ("timestamp", pyarrow.int64()),
+            ("value", pyarrow.float64())
+        ])
+        os.makedirs(directory, exist_ok=True)
+
+
+    def _series_directory(self, meter: str, kind: str) -> str:
+        return os.path.join(self.directory, _safe_name(meter), kind)
+
+
+    def _segments(self, meter: str, kind: str) -> list:
+        """Segment index of (first timestamp, last timestamp, path), ordered by time
+
+        Appends never overlap, so a segment inside another's range was left behind
+        by an interrupted compaction and is already in the merged one. It is skipped.
+        """
+        directory = self._series_directory(meter, kind)
+        if not os.path.isdir(directory):
+            return []
+
+        segments = []
+        for name in os.listdir(directory):
+            match = re.fullmatch(r"(\d+)-(\d+)\.arrow", name)
+            if match:
+                segments.append((int(match.group(1)), int(match.group(2)), os.path.join(directory, name)))
+        # Widest first among equal starts, so a merged segment is seen before those it replaced
+        segments.sort(key=lambda segment: (segment[0], -segment[1]))
+
+        current = []
+        for segment in segments:
+            if current and segment[1] <= current[-1][1]:
+                continue
+            current.append(segment)
+        return current
+
+
+    def _read_segment(self, path: str):
+        source = self.pyarrow.memory_map(path, "r")
+        return self.pyarrow.ipc.open_file(source).read_all()
+
+
+    def _write_segment(self, meter: str, kind: str, records: list):
+        table = self.pyarrow.Table.from_arrays([
+            self.pyarrow.array([record[0] for record in records], type=self.pyarrow.int64()),
+            self.pyarrow.array([record[1] for record in records], type=self.pyarrow.float64())
+        ], schema=self.schema)
+        return self._write_table(meter, kind, table)
+
+
+    def _write_table(self, meter: str, kind: str, table):
+        """Write a time ordered table as one segment, atomically"""
+        directory = self._series_directory(meter, kind)
+        os.makedirs(directory, exist_ok=True)
+
+        timestamps = table.column(0)
+        path = os.path.join(directory, f"{timestamps[0].as_py()}-{timestamps[-1].as_py()}.arrow")
+        temp_path = path + ".tmp"
+        with self.pyarrow.OSFile(temp_path, "wb") as sink:
+            with self.pyarrow.ipc.new_file(sink, self.schema) as writer:
+                writer.write_table(table)
+        os.replace(temp_path, path)
+        return path
+
+
+    def last_timestamp(self, meter: str, kind: str = KIND_READING) -> int:
+        segments = self._segments(meter, kind)
+        if len(segments) == 0:
+            return None
+        return segments[-1][1]
+
+
+    def last_record(self, meter: str, kind: str = KIND_READING) -> tuple:
+        segments = self._segments(meter, kind)
+        if len(segments) == 0:
+            return None
+        table = self._read_segment(segments[-1][2])
+        return (table.column(0)[-1].as_py(), table.column(1)[-1].as_py())
+
+
+    def append(self, meter: str, kind: str, records) -> int:
+        """Append records newer than the last stored one, returning how many were written"""
+        prepared = _prepare_records(records, self.last_timestamp(meter, kind))
+        if len(prepared) == 0:
+            return 0
+
+        self._write_segment(meter, kind, prepared)
+        if len(self._segments(meter, kind)) > MAX_ARROW_SEGMENTS:
+            self.compact(meter, kind)
+        return len(prepared)
+
+
+    def query(self, meter: str, kind: str = KIND_READING, start=None, end=None):
+        """Records with start <= timestamp < end, as a pyarrow Table over the mapped segments"""
+        start = _to_timestamp(start)
+        end = _to_timestamp(end)
+
+        tables = []
+        for first, last, path in self._segments(meter, kind):
+            if (start is not None and last < start) or (end is not None and first >= end):
+                continue
+
+            table = self._read_segment(path)
+            timestamps = table.column(0).combine_chunks()
+            lower = 0 if start is None else bisect.bisect_left(_ArrowTimestamps(timestamps), start)
+            upper = table.num_rows if end is None else bisect.bisect_left(_ArrowTimestamps(timestamps), end)
+            if upper > lower:
+                tables.append(table.slice(lower, upper - lower))
+
+        if len(tables) == 0:
+            return self.schema.empty_table()
+        return self.pyarrow.concat_tables(tables)
+
+
+    def compact(self, meter: str, kind: str = KIND_READING) -> None:
+        """Merge all segments of a series into one"""
+        segments = self._segments(meter, kind)
+        if len(segments) < 2:
+            return
+
+        table = self.pyarrow.concat_tables([self._read_segment(path) for first, last, path in segments])
+        merged = self._write_table(meter, kind, table.combine_chunks())
+
+        # Until these are gone the merged segment covers them, and reads skip them
+        for first, last, path in segments:
+            if path != merged:
+                os.remove(path)
+
+
+    def close(self):
+        pass
+
+
+
+class _ArrowTimestamps:
+    """Sequence view of an Arrow int64 array, for bisect"""
+
+    def __init__(self, array):
+        self.array = array
+
+    def __len__(self) -> int:
+        return len(self.array)
+
+    def __getitem__(self, index: int) -> int:
+        return self.array[index].as_py()
+
+
+
+def open_history_store(directory: str, backend: str = None):
+    """Open a history store, preferring Arrow when pyarrow is installed"""
+    if backend is None:
+        try:
+            import pyarrow.ipc
+            backend = BACKEND_ARROW
+        except ImportError:
+            backend = BACKEND_FIXED_WIDTH
+
+    if backend == BACKEND_ARROW:
+        return ArrowHistoryStore(directory)
+    if backend == BACKEND_FIXED_WIDTH:
+        return FixedWidthHistoryStore(directory)
+    raise ValueError(f"Unknown history store backend: {backend}")
+
+
+
+def _spilled_batches(spill, count: int):
+    """Read back newest first spilled records as oldest first batches of up to `SYNC_BATCH_SIZE`"""
+    end = count
+    while end > 0:
+        start = max(0, end - SYNC_BATCH_SIZE)
+        spill.seek(start * SPILL_RECORD.size)
+        batch = list(SPILL_RECORD.iter_unpack(spill.read((end - start) * SPILL_RECORD.size)))
+        batch.reverse()
+        yield batch
+        end = start
+
+
+class HistoryExporter:
+    """Incrementally copies meter reading history from the API into a history store"""
+
+    def __init__(self, store):
+        self.store = store
+
+
+    async def sync_meter(self, meter, since: datetime.datetime = None) -> int:
+        """Append readings newer than those already stored, plus consumption between them
+
+        Gas consumption is also stored converted to kWh with the account's calorific values.
+        """
+        key = meter.get_serial()
+        last = self.store.last_timestamp(key, KIND_READING)
+        if last is not None:
+            since = datetime.datetime.fromtimestamp(last + 1, datetime.timezone.utc)
+
+        with tempfile.TemporaryFile() as spill:
+            count = 0
+            async for reading in meter.iter_readings(since):
+                spill.write(SPILL_RECORD.pack(_to_timestamp(reading.read_at), reading.value))
+                count += 1
+
+            previous = self.store.last_record(key, KIND_READING)
+            written = 0
+            for readings in _spilled_batches(spill, count):
+                consumption = []
+                for timestamp, value in readings:
+                    # A drop in the register means a meter exchange or reset, not negative use
+                    if previous is not None and timestamp > previous[0] and value >= previous[1]:
+                        consumption.append((timestamp, value - previous[1]))
+                    previous = (timestamp, value)
+
+                written += self.store.append(key, KIND_READING, readings)
+                self.store.append(key, KIND_CONSUMPTION, consumption)
+                if meter.get_type() == METER_TYPE_GAS:
+                    self.store.append(key, KIND_CONSUMPTION_KWH, meter.account.calorific_values.convert_series(consumption))
+        return written
+
+
+    async def sync(self, api, since: datetime.datetime = None, job=None) -> int:
+        """Sync every meter, reporting progress per meter to `job` if given"""
+        meters = [meter for account in api.accounts for meter in account.meters]
+
+        written = 0
+        for done, meter in enumerate(meters):
+            if job is not None:
+                job.report(done, len(meters))
+            written += await self.sync_meter(meter, since)
+
+        if job is not None:
+            job.report(len(meters), len(meters))
+        return written
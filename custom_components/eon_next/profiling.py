@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""Timing spans and cProfile capture for a refresh cycle.
+
+Spans cost a context variable lookup when no profile is running, so they are
+left in place around API requests and entity updates permanently.
+"""
+
+import contextlib
+import contextvars
+import cProfile
+import io
+import logging
+import pstats
+import time
+
+_LOGGER = logging.getLogger(__name__)
+
+PSTATS_LIMIT = 60
+
+_active_profile = contextvars.ContextVar("eon_next_profile", default=None)
+_current_span = contextvars.ContextVar("eon_next_span", default=None)
+
+
+class Span:
+
+    __slots__ = ("name", "start", "end", "children")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.start = time.perf_counter()
+        self.end = None
+        self.children = []
+
+
+    @property
+    def duration(self) -> float:
+        return (self.end if self.end is not None else time.perf_counter()) - self.start
+
+
+    def render(self, lines: list, depth: int = 0) -> None:
+        own = self.duration - sum(child.duration for child in self.children)
+        lines.append(f"{'  ' * depth}{self.name}: {self.duration * 1000:.1f}ms (self {own * 1000:.1f}ms)")
+        for child in self.children:
+            child.render(lines, depth + 1)
+
+
+
+class Profile:
+    """A span tree plus cProfile statistics for one profiled run"""
+
+    def __init__(self, name: str):
+        self.root = Span(name)
+        self.profiler = cProfile.Profile()
+
+
+    def report(self) -> str:
+        lines = ["Span tree", "========="]
+        self.root.render(lines)
+
+        stats_output = io.StringIO()
+        stats = pstats.Stats(self.profiler, stream=stats_output)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(PSTATS_LIMIT)
+
+        lines += ["", "cProfile (cumulative)", "====================", stats_output.getvalue()]
+        return "\n".join(lines)
+
+
+@contextlib.contextmanager
+def span(name: str, *args):
+    """Time the enclosed block as a child of the current span, when profiling
+
+    Like logging, `name` is only formatted with `args` when a profile is running.
+    """
+    profile = _active_profile.get()
+    if profile is None:
+        yield None
+        return
+
+    parent = _current_span.get() or profile.root
+    current = Span(name % args if args else name)
+    parent.children.append(current)
+
+    token = _current_span.set(current)
+    try:
+        yield current
+    finally:
+        current.end = time.perf_counter()
+        _current_span.reset(token)
+
+
+async def run_profiled(name: str, work) -> Profile:
+    """Await `work()` with spans recorded and cProfile enabled.
+
+    cProfile sees everything running on the event loop meanwhile, not only `work`.
+    """
+    profile = Profile(name)
+    profile_token = _active_profile.set(profile)
+    span_token = _current_span.set(profile.root)
+
+    profile.profiler.enable()
+    try:
+        await work()
+    finally:
+        profile.profiler.disable()
+        profile.root.end = time.perf_counter()
+        _current_span.reset(span_token)
+        _active_profile.reset(profile_token)
+
+    return profile
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""Priority aware scheduling of API requests.
+
+Requests are admitted in priority order, subject to an overall concurrency
+limit and a budget per priority class. Bulk work can therefore never hold
+more than its own budget of connections, leaving the rest free for the
+interactive refreshes entities depend on.
+"""
+
+import asyncio
+import contextlib
+import contextvars
+import heapq
+import itertools
+import logging
+
+from .profiling import span
+
+_LOGGER = logging.getLogger(__name__)
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_PERIODIC = 1
+PRIORITY_BULK = 2
+
+PRIORITY_NAMES = {
+    PRIORITY_INTERACTIVE: "interactive",
+    PRIORITY_PERIODIC: "periodic",
+    PRIORITY_BULK: "bulk"
+}
+
+DEFAULT_MAX_CONCURRENT = 4
+
+
+def scaled_budgets(max_concurrent: int) -> dict:
+    """Per class budgets for an overall limit: all of it, a half and a quarter"""
+    return {
+        PRIORITY_INTERACTIVE: max_concurrent,
+        PRIORITY_PERIODIC: max(1, max_concurrent // 2),
+        PRIORITY_BULK: max(1, max_concurrent // 4)
+    }
+
+
+DEFAULT_BUDGETS = scaled_budgets(DEFAULT_MAX_CONCURRENT)
+
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+
+# Priority for requests which do not ask for one, set to bulk inside jobs
+current_priority = contextvars.ContextVar("eon_next_request_priority", default=PRIORITY_PERIODIC)
+
+
+class Job:
+    """A long running piece of bulk work that can report progress and be cancelled"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.status = JOB_RUNNING
+        self.done = 0
+        self.total = None
+        self.error = None
+        self.task = None
+        self._listeners = []
+
+
+    def add_listener(self, listener) -> None:
+        """Call `listener(job)` whenever progress is reported"""
+        self._listeners.append(listener)
+
+
+    def report(self, done: int, total: int = None) -> None:
+        self.done = done
+        if total is not None:
+            self.total = total
+        for listener in self._listeners:
+            listener(self)
+
+
+    def cancel(self) -> None:
+        if self.task is not None:
+            self.task.cancel()
+
+
+    async def wait(self):
+        return await self.task
+
+
+
+class RequestScheduler:
+
+    def __init__(self, max_concurrent: int = DEFAULT_MAX_CONCURRENT, budgets: dict = None):
+        self.max_concurrent = max_concurrent
+        self.budgets = dict(DEFAULT_BUDGETS)
+        if budgets:
+            self.budgets.update(budgets)
+
+        self.running = {priority: 0 for priority in PRIORITY_NAMES}
+        self.jobs = []
+        self._waiters = []
+        self._sequence = itertools.count()
+
+
+    def configure(self, max_concurrent: int = None, budgets: dict = None) -> None:
+        """Change the limits, taking effect for the next requests admitted"""
+        if max_concurrent is not None:
+            self.max_concurrent = max_concurrent
+            if budgets is None:
+                budgets = scaled_budgets(max_concurrent)
+        if budgets:
+            self.budgets.update(budgets)
+        self._dispatch()
+
+
+    def _can_run(self, priority: int) -> bool:
+        return (
+            sum(self.running.values()) < self.max_concurrent
+            and self.running[priority] < min(self.budgets[priority], self.max_concurrent)
+        )
+
+
+    def _dispatch(self) -> None:
+        """Admit waiting requests, highest priority first, while there is capacity"""
+        blocked = []
+        while self._waiters and sum(self.running.values()) < self.max_concurrent:
+            waiter = heapq.heappop(self._waiters)
+            priority, sequence, future = waiter
+            if future.done():
+                continue
+            if self._can_run(priority):
+                self.running[priority] += 1
+                future.set_result(None)
+            else:
+                blocked.append(waiter)
+
+        for waiter in blocked:
+            heapq.heappush(self._waiters, waiter)
+
+
+    async def acquire(self, priority: int) -> None:
+        if self._can_run(priority) and not any(waiter[0] <= priority for waiter in self._waiters):
+            self.running[priority] += 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Admitted just as we were cancelled, hand the slot on
+                self.release(priority)
+            raise
+
+
+    def release(self, priority: int) -> None:
+        self.running[priority] -= 1
+        self._dispatch()
+
+
+    @contextlib.asynccontextmanager
+    async def slot(self, priority: int = None):
+        if priority is None:
+            priority = current_priority.get()
+
+        with span("queue"):
+            await self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release(priority)
+
+
+    def start_job(self, name: str, work) -> Job:
+        """Run `work(job)` as a background task whose requests default to bulk priority"""
+        job = Job(name)
+
+        async def run():
+            current_priority.set(PRIORITY_BULK)
+            try:
+                result = await work(job)
+                job.status = JOB_DONE
+                return result
+            except asyncio.CancelledError:
+                job.status = JOB_CANCELLED
+                raise
+            except Exception as e:
+                job.status = JOB_FAILED
+                job.error = e
+                raise
+            finally:
+                self.jobs.remove(job)
+
+        self.jobs.append(job)
+        job.task = asyncio.get_running_loop().create_task(run(), name=f"eon_next job {name}")
+        return job
@@ -1,7 +1,12 @@
 #!/usr/bin/env python3
 
 import logging
+from homeassistant.core import callback
 from homeassistant.util import dt as dt_util
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.event import async_track_point_in_utc_time
+from homeassistant.helpers.restore_state import RestoreEntity
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from homeassistant.components.sensor import (
     SensorDeviceClass,
@@ -14,7 +19,25 @@ from homeassistant.const import (
 )
 
 from . import DOMAIN
-from .eonnext import METER_TYPE_GAS, METER_TYPE_ELECTRIC, METER_TYPE_EV
+from .coordinator import (
+    DATA_READINGS,
+    DATA_TARIFFS,
+    DATA_DISPATCHES,
+    DATA_SESSIONS,
+    create_account_coordinators,
+    register_coordinators
+)
+from .profiling import span
+from .eonnext import (
+    METER_TYPE_GAS,
+    METER_TYPE_ELECTRIC,
+    METER_TYPE_EV,
+    SUBSYSTEMS,
+    SUBSYSTEM_METERS,
+    SUBSYSTEM_EV_CHARGERS,
+    SUBSYSTEM_TARIFFS,
+    SUBSYSTEM_SAVING_SESSIONS
+)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -23,63 +46,164 @@ async def async_setup_entry(hass, config_entry, async_add_entities):
     """Setup sensors from a config entry created in the integrations UI."""
 
     api = hass.data[DOMAIN][config_entry.entry_id]
+    skipped = _disabled_subsystems(hass, config_entry)
 
     entities = []
     for account in api.accounts:
-        for meter in account.meters:
+        for subsystem in SUBSYSTEMS:
+            if subsystem not in skipped:
+                await account.ensure_loaded(subsystem)
+
+        coordinators = create_account_coordinators(hass, config_entry, account)
+        readings = coordinators[DATA_READINGS]
+        tariffs = coordinators[DATA_TARIFFS]
+        dispatches = coordinators[DATA_DISPATCHES]
+        sessions = coordinators[DATA_SESSIONS]
+
+        # Meters may still be loaded for their postcode when only saving sessions are in use
+        meters = account.meters if SUBSYSTEM_METERS not in skipped else []
+        for meter in meters:
             if await meter.has_reading() == True:
 
-                entities.append(LatestReadingDateSensor(meter))
+                entities.append(LatestReadingDateSensor(readings, meter))
 
                 if meter.get_type() == METER_TYPE_ELECTRIC:
-                    entities.append(LatestElectricKwhSensor(meter))
-                
+                    entities.append(LatestElectricKwhSensor(readings, meter))
+
                 if meter.get_type() == METER_TYPE_GAS:
-                    entities.append(LatestGasCubicMetersSensor(meter))
-                    entities.append(LatestGasKwhSensor(meter))
-        
+                    entities.append(LatestGasCubicMetersSensor(readings, meter))
+                    entities.append(LatestGasKwhSensor(readings, meter))
+
         for charger in account.ev_chargers:
-            entities.append(SmartChargingScheduleSensor(charger))
-            entities.append(NextChargeStartSensor(charger))
-            entities.append(NextChargeEndSensor(charger))
-            entities.append(NextChargeStartSensor2(charger))
-            entities.append(NextChargeEndSensor2(charger))
-        
+            entities.append(SmartChargingScheduleSensor(dispatches, charger))
+            entities.append(NextChargeStartSensor(dispatches, charger))
+            entities.append(NextChargeEndSensor(dispatches, charger))
+            entities.append(NextChargeStartSensor2(dispatches, charger))
+            entities.append(NextChargeEndSensor2(dispatches, charger))
+            entities.append(ChargingEnergyAddedSensor(dispatches, charger))
+
         # Add tariff sensors for the account
         if account.tariff_data:
-            entities.append(TariffNameSensor(account))
-            entities.append(StandingChargeSensor(account))
-            entities.append(UnitRateSensor(account))
-        
+            entities.append(TariffNameSensor(tariffs, account))
+            entities.append(StandingChargeSensor(tariffs, account))
+            entities.append(UnitRateSensor(tariffs, account))
+
         # Add saving session sensors
         if account.saving_sessions:
-            entities.append(SavingSessionsSensor(account))
+            entities.append(SavingSessionsSensor(sessions, account))
+
+        # Each data class is fetched once per cycle, however many entities share it
+        with_entities = set(entity.coordinator for entity in entities)
+        used = [coordinator for coordinator in coordinators.values() if coordinator in with_entities]
+        register_coordinators(hass, config_entry, used)
+        for coordinator in used:
+            await coordinator.async_refresh()
+
+    async_add_entities(entities)
+
+
+
+# Which account subsystem feeds each entity, by the suffix of its unique id
+UNIQUE_ID_SUBSYSTEMS = {
+    "reading_date": SUBSYSTEM_METERS,
+    "electricity_kwh": SUBSYSTEM_METERS,
+    "gas_kwh": SUBSYSTEM_METERS,
+    "gas_m3": SUBSYSTEM_METERS,
+    "smart_charging_schedule": SUBSYSTEM_EV_CHARGERS,
+    "next_charge_start": SUBSYSTEM_EV_CHARGERS,
+    "next_charge_end": SUBSYSTEM_EV_CHARGERS,
+    "next_charge_start_2": SUBSYSTEM_EV_CHARGERS,
+    "next_charge_end_2": SUBSYSTEM_EV_CHARGERS,
+    "charging_energy_added": SUBSYSTEM_EV_CHARGERS,
+    "tariff_name": SUBSYSTEM_TARIFFS,
+    "standing_charge": SUBSYSTEM_TARIFFS,
+    "unit_rate": SUBSYSTEM_TARIFFS,
+    "saving_sessions": SUBSYSTEM_SAVING_SESSIONS
+}
+
+
+def _disabled_subsystems(hass, config_entry) -> set:
+    """Subsystems whose registered entities are all disabled, so need not be loaded at all
+
+    A subsystem with no registered entities yet is loaded, so its entities can be created.
+    """
+    registry = er.async_get(hass)
+
+    enabled = set()
+    registered = set()
+    for entry in er.async_entries_for_config_entry(registry, config_entry.entry_id):
+        subsystem = UNIQUE_ID_SUBSYSTEMS.get(entry.unique_id.rsplit("__", 1)[-1])
+        if subsystem is None:
+            continue
+        registered.add(subsystem)
+        if entry.disabled_by is None:
+            enabled.add(subsystem)
+
+    return registered - enabled
+
+
+
+class EonNextSensor(CoordinatorEntity, SensorEntity):
+    """Sensor which only writes state when its value or attributes actually change"""
+
+    def __init__(self, coordinator):
+        super().__init__(coordinator)
+        self._last_state = None
+
+
+    def _compute_state(self) -> tuple:
+        """Return the (native value, extra state attributes) for the current data"""
+        return None, None
+
 
-    async_add_entities(entities, update_before_add=True)
+    def _refresh_state(self) -> bool:
+        value, attributes = self._compute_state()
+        state = (self.available, value, attributes)
+        if state == self._last_state:
+            return False
 
+        self._last_state = state
+        self._attr_native_value = value
+        self._attr_extra_state_attributes = attributes
+        return True
 
 
-class LatestReadingDateSensor(SensorEntity):
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        self._refresh_state()
+
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        with span("entity %s", self.entity_id):
+            if self._refresh_state() == True:
+                self.async_write_ha_state()
+
+
+
+class LatestReadingDateSensor(EonNextSensor):
     """Date of latest meter reading"""
 
-    def __init__(self, meter):
+    def __init__(self, coordinator, meter):
+        super().__init__(coordinator)
         self.meter = meter
 
         self._attr_name = self.meter.get_serial() + " Reading Date"
         self._attr_device_class = SensorDeviceClass.DATE
         self._attr_icon = "mdi:calendar"
         self._attr_unique_id = self.meter.get_serial() + "__" + "reading_date"
-    
 
-    async def async_update(self) -> None:
-        self._attr_native_value = await self.meter.get_latest_reading_date()
+
+    def _compute_state(self) -> tuple:
+        return self.meter.latest_reading_date, None
 
 
 
-class LatestElectricKwhSensor(SensorEntity):
+class LatestElectricKwhSensor(EonNextSensor):
     """Latest electricity meter reading"""
 
-    def __init__(self, meter):
+    def __init__(self, coordinator, meter):
+        super().__init__(coordinator)
         self.meter = meter
 
         self._attr_name = self.meter.get_serial() + " Electricity"
@@ -88,17 +212,18 @@ class LatestElectricKwhSensor(SensorEntity):
         self._attr_state_class = "total"
         self._attr_icon = "mdi:meter-electric-outline"
         self._attr_unique_id = self.meter.get_serial() + "__" + "electricity_kwh"
-    
 
-    async def async_update(self) -> None:
-        self._attr_native_value = await self.meter.get_latest_reading()
 
+    def _compute_state(self) -> tuple:
+        return self.meter.latest_reading, None
 
 
-class LatestGasKwhSensor(SensorEntity):
-    """Latest gas meter reading in kWh"""
 
-    def __init__(self, meter):
+class LatestGasKwhSensor(EonNextSensor, RestoreEntity):
+    """Running total of gas used in kWh, each reading interval converted with its own day's calorific value"""
+
+    def __init__(self, coordinator, meter):
+        super().__init__(coordinator)
         self.meter = meter
 
         self._attr_name = self.meter.get_serial() + " Gas kWh"
@@ -107,17 +232,43 @@ class LatestGasKwhSensor(SensorEntity):
         self._attr_state_class = "total"
         self._attr_icon = "mdi:meter-gas-outline"
         self._attr_unique_id = self.meter.get_serial() + "__" + "gas_kwh"
-    
 
-    async def async_update(self) -> None:
-        self._attr_native_value = await self.meter.get_latest_reading_kwh()
 
+    async def async_added_to_hass(self) -> None:
+        # Continue the total from before a restart, rather than from the first reading fetched since
+        last_state = await self.async_get_last_state()
+        if last_state is not None:
+            attributes = last_state.attributes
+            read_at = dt_util.parse_datetime(attributes.get("read_at") or "")
+            try:
+                kwh = float(last_state.state)
+                m3 = float(attributes["reading_m3"])
+            except (KeyError, TypeError, ValueError):
+                read_at = None
+            if read_at is not None:
+                self.meter.restore_kwh(read_at, m3, kwh)
+
+        await super().async_added_to_hass()
+
+
+    def _compute_state(self) -> tuple:
+        latest = self.meter.energy.latest()
+        if latest is None:
+            return None, None
 
+        timestamp, m3 = latest
+        return self.meter.get_cached_latest_reading_kwh(), {
+            "read_at": dt_util.utc_from_timestamp(timestamp).isoformat(),
+            "reading_m3": m3
+        }
 
-class LatestGasCubicMetersSensor(SensorEntity):
+
+
+class LatestGasCubicMetersSensor(EonNextSensor):
     """Latest gas meter reading in kWh"""
 
-    def __init__(self, meter):
+    def __init__(self, coordinator, meter):
+        super().__init__(coordinator)
         self.meter = meter
 
         self._attr_name = self.meter.get_serial() + " Gas"
@@ -126,302 +277,326 @@ class LatestGasCubicMetersSensor(SensorEntity):
         self._attr_state_class = "total"
         self._attr_icon = "mdi:meter-gas-outline"
         self._attr_unique_id = self.meter.get_serial() + "__" + "gas_m3"
-    
 
-    async def async_update(self) -> None:
-        self._attr_native_value = await self.meter.get_latest_reading()
+
+    def _compute_state(self) -> tuple:
+        return self.meter.latest_reading, None
 
 
-class SmartChargingScheduleSensor(SensorEntity):
+class SmartChargingScheduleSensor(EonNextSensor):
     """Smart Charging Schedule"""
 
-    def __init__(self, charger):
+    def __init__(self, coordinator, charger):
+        super().__init__(coordinator)
         self.charger = charger
 
         self._attr_name = self.charger.get_serial() + " Smart Charging Schedule"
         self._attr_icon = "mdi:ev-station"
         self._attr_unique_id = self.charger.get_serial() + "__" + "smart_charging_schedule"
-        self._attr_extra_state_attributes = {}
-    
 
-    async def async_update(self) -> None:
-        schedule = await self.charger.get_schedule()
+
+    def _compute_state(self) -> tuple:
+        schedule = self.charger.schedule
         if schedule is not None:
             if len(schedule) > 0:
-                self._attr_native_value = "Active"
-                self._attr_extra_state_attributes["schedule"] = schedule
-            else:
-                self._attr_native_value = "No Schedule"
-                self._attr_extra_state_attributes["schedule"] = []
-        else:
-            self._attr_native_value = "Unknown"
+                return "Active", {"schedule": [dispatch.as_dict() for dispatch in schedule]}
+            return "No Schedule", {"schedule": []}
+        return "Unknown", {}
 
 
-class NextChargeStartSensor(SensorEntity):
+class NextChargeStartSensor(EonNextSensor):
     """Start time of next charge"""
 
-    def __init__(self, charger):
+    def __init__(self, coordinator, charger):
+        super().__init__(coordinator)
         self.charger = charger
 
         self._attr_name = self.charger.get_serial() + " Next Charge Start"
         self._attr_device_class = SensorDeviceClass.TIMESTAMP
         self._attr_icon = "mdi:clock-start"
         self._attr_unique_id = self.charger.get_serial() + "__" + "next_charge_start"
-    
 
-    async def async_update(self) -> None:
-        schedule = await self.charger.get_schedule()
+
+    def _compute_state(self) -> tuple:
+        schedule = self.charger.schedule
         if schedule and len(schedule) > 0:
-            self._attr_native_value = dt_util.parse_datetime(schedule[0]['start'])
-        else:
-            self._attr_native_value = None
+            return schedule[0].start, None
+        return None, None
 
 
-class NextChargeEndSensor(SensorEntity):
+class NextChargeEndSensor(EonNextSensor):
     """End time of next charge"""
 
-    def __init__(self, charger):
+    def __init__(self, coordinator, charger):
+        super().__init__(coordinator)
         self.charger = charger
 
         self._attr_name = self.charger.get_serial() + " Next Charge End"
         self._attr_device_class = SensorDeviceClass.TIMESTAMP
         self._attr_icon = "mdi:clock-end"
         self._attr_unique_id = self.charger.get_serial() + "__" + "next_charge_end"
-    
 
-    async def async_update(self) -> None:
-        schedule = await self.charger.get_schedule()
+
+    def _compute_state(self) -> tuple:
+        schedule = self.charger.schedule
         if schedule and len(schedule) > 0:
-            self._attr_native_value = dt_util.parse_datetime(schedule[0]['end'])
-        else:
-            self._attr_native_value = None
+            return schedule[0].end, None
+        return None, None
 
 
-class NextChargeStartSensor2(SensorEntity):
+class NextChargeStartSensor2(EonNextSensor):
     """Start time of next charge slot 2"""
 
-    def __init__(self, charger):
+    def __init__(self, coordinator, charger):
+        super().__init__(coordinator)
         self.charger = charger
 
         self._attr_name = self.charger.get_serial() + " Next Charge Start 2"
         self._attr_device_class = SensorDeviceClass.TIMESTAMP
         self._attr_icon = "mdi:clock-start"
         self._attr_unique_id = self.charger.get_serial() + "__" + "next_charge_start_2"
-    
 
-    async def async_update(self) -> None:
-        schedule = await self.charger.get_schedule()
+
+    def _compute_state(self) -> tuple:
+        schedule = self.charger.schedule
         if schedule and len(schedule) > 1:
-            self._attr_native_value = dt_util.parse_datetime(schedule[1]['start'])
-        else:
-            self._attr_native_value = None
+            return schedule[1].start, None
+        return None, None
 
 
-class NextChargeEndSensor2(SensorEntity):
+class NextChargeEndSensor2(EonNextSensor):
     """End time of next charge slot 2"""
 
-    def __init__(self, charger):
+    def __init__(self, coordinator, charger):
+        super().__init__(coordinator)
         self.charger = charger
 
         self._attr_name = self.charger.get_serial() + " Next Charge End 2"
         self._attr_device_class = SensorDeviceClass.TIMESTAMP
         self._attr_icon = "mdi:clock-end"
         self._attr_unique_id = self.charger.get_serial() + "__" + "next_charge_end_2"
-    
 
-    async def async_update(self) -> None:
-        schedule = await self.charger.get_schedule()
+
+    def _compute_state(self) -> tuple:
+        schedule = self.charger.schedule
         if schedule and len(schedule) > 1:
-            self._attr_native_value = dt_util.parse_datetime(schedule[1]['end'])
-        else:
-            self._attr_native_value = None
+            return schedule[1].end, None
+        return None, None
+
+
+class ChargingEnergyAddedSensor(EonNextSensor):
+    """Energy added by completed smart charging dispatches
 
+    The total can fall, when a dispatch is reported again with less energy than first
+    recorded. That is a correction rather than a meter reset, so it is left unclamped:
+    state class `total` takes a decrease as negative energy, keeping statistics right.
+    """
 
-class TariffNameSensor(SensorEntity):
+    def __init__(self, coordinator, charger):
+        super().__init__(coordinator)
+        self.charger = charger
+
+        self._attr_name = self.charger.get_serial() + " Charging Energy Added"
+        self._attr_device_class = SensorDeviceClass.ENERGY
+        self._attr_native_unit_of_measurement = UnitOfEnergy.KILO_WATT_HOUR
+        self._attr_state_class = "total"
+        self._attr_icon = "mdi:car-electric"
+        self._attr_unique_id = self.charger.get_serial() + "__" + "charging_energy_added"
+
+
+    def _compute_state(self) -> tuple:
+        history = self.charger.history
+        if len(history) == 0:
+            return None, None
+
+        # Totals only, the dispatches themselves are in long-term statistics
+        return round(history.energy_added(), 3), {
+            "cheap_rate_kwh": round(history.cheap_rate_energy(), 3),
+            "dispatches": len(history)
+        }
+
+
+class TariffNameSensor(EonNextSensor):
     """Active tariff name for the account"""
 
-    def __init__(self, account):
+    def __init__(self, coordinator, account):
+        super().__init__(coordinator)
         self.account = account
 
         self._attr_name = f"Account {self.account.account_number} Tariff Name"
         self._attr_icon = "mdi:file-document-outline"
         self._attr_unique_id = f"{self.account.account_number}__tariff_name"
-    
-
-    async def async_update(self) -> None:
-        await self.account._load_tariff_data()
-        if self.account.tariff_data and len(self.account.tariff_data) > 0:
-            # Get the most recent active agreement
-            active = [a for a in self.account.tariff_data if not a.get('validTo') or dt_util.parse_datetime(a['validTo']) > dt_util.now()]
-            if active:
-                tariff = active[0].get('tariff', {})
-                self._attr_native_value = tariff.get('displayName') or tariff.get('fullName')
-                self._attr_extra_state_attributes = {
-                    "tariff_code": tariff.get('tariffCode'),
-                    "tariff_type": tariff.get('tariffType'),
-                    "is_variable": tariff.get('isVariable'),
-                    "valid_from": active[0].get('validFrom'),
-                    "valid_to": active[0].get('validTo')
-                }
-            else:
-                self._attr_native_value = None
-        else:
-            self._attr_native_value = None
 
 
-class StandingChargeSensor(SensorEntity):
+    def _compute_state(self) -> tuple:
+        active = self.account.get_active_agreement(dt_util.now())
+        if active is None:
+            return None, None
+
+        tariff = active.tariff
+        return tariff.display_name or tariff.full_name, {
+            "tariff_code": tariff.tariff_code,
+            "tariff_type": tariff.tariff_type,
+            "is_variable": tariff.is_variable,
+            "valid_from": active.valid_from.isoformat() if active.valid_from else None,
+            "valid_to": active.valid_to.isoformat() if active.valid_to else None
+        }
+
+
+class StandingChargeSensor(EonNextSensor):
     """Daily standing charge for the account"""
 
-    def __init__(self, account):
+    def __init__(self, coordinator, account):
+        super().__init__(coordinator)
         self.account = account
 
         self._attr_name = f"Account {self.account.account_number} Standing Charge"
         self._attr_icon = "mdi:currency-gbp"
         self._attr_unit_of_measurement = "GBP/day"
         self._attr_unique_id = f"{self.account.account_number}__standing_charge"
-    
-
-    async def async_update(self) -> None:
-        await self.account._load_tariff_data()
-        if self.account.tariff_data and len(self.account.tariff_data) > 0:
-            active = [a for a in self.account.tariff_data if not a.get('validTo') or dt_util.parse_datetime(a['validTo']) > dt_util.now()]
-            if active:
-                tariff = active[0].get('tariff', {})
-                standing_charge = tariff.get('standingCharge')
-                if standing_charge is not None:
-                    # Convert pence to pounds
-                    self._attr_native_value = round(standing_charge / 100, 4)
-                else:
-                    self._attr_native_value = None
-            else:
-                self._attr_native_value = None
-        else:
-            self._attr_native_value = None
 
 
-class UnitRateSensor(SensorEntity):
+    def _compute_state(self) -> tuple:
+        active = self.account.get_active_agreement(dt_util.now())
+        if active is None:
+            return None, None
+
+        standing_charge = active.tariff.standing_charge
+        if standing_charge is None:
+            return None, None
+
+        # Convert pence to pounds
+        return round(standing_charge / 100, 4), None
+
+
+class UnitRateSensor(EonNextSensor):
     """Unit rate for the account"""
 
-    def __init__(self, account):
+    def __init__(self, coordinator, account):
+        super().__init__(coordinator)
         self.account = account
 
         self._attr_name = f"Account {self.account.account_number} Unit Rate"
         self._attr_icon = "mdi:currency-gbp"
         self._attr_unit_of_measurement = "GBP/kWh"
         self._attr_unique_id = f"{self.account.account_number}__unit_rate"
-    
-
-    async def async_update(self) -> None:
-        await self.account._load_tariff_data()
-        if self.account.tariff_data and len(self.account.tariff_data) > 0:
-            active = [a for a in self.account.tariff_data if not a.get('validTo') or dt_util.parse_datetime(a['validTo']) > dt_util.now()]
-            if active:
-                tariff = active[0].get('tariff', {})
-                unit_rate = tariff.get('unitRate')
-                
-                # Handle HalfHourlyTariff with multiple rates
-                if unit_rate is None and tariff.get('unitRates'):
-                    rates = tariff.get('unitRates')
-                    if len(rates) > 0:
-                        # Extract unique rates
-                        unique_rates = sorted(list(set([r['value'] for r in rates])))
-                        
-                        # Default to the first rate (usually low/night rate if sorted, but we want current)
-                        # Logic for Next Drive: 00:00 - 07:00 is Off-Peak (Low)
-                        is_next_drive = "Next Drive" in (tariff.get('displayName') or "")
-                        
-                        if is_next_drive and len(unique_rates) >= 2:
-                            low_rate = unique_rates[0]
-                            high_rate = unique_rates[1] # Assuming 2 rates for now
-                            
-                            now = dt_util.now()
-                            # Next Drive Off-Peak is 00:00 to 07:00
-                            if 0 <= now.hour < 7:
-                                unit_rate = low_rate
-                                current_period = "Off-Peak"
-                            else:
-                                unit_rate = high_rate
-                                current_period = "Peak"
-                                
-                            self._attr_extra_state_attributes = {
-                                "meter_point": active[0].get('meterPoint', {}).get('mpan') or active[0].get('meterPoint', {}).get('mprn'),
-                                "rates": unique_rates,
-                                "current_period": current_period,
-                                "low_rate": round(low_rate / 100, 4),
-                                "high_rate": round(high_rate / 100, 4)
-                            }
-                        else:
-                            # Fallback for unknown multi-rate tariffs
-                            unit_rate = rates[0].get('value')
-                            self._attr_extra_state_attributes = {
-                                "meter_point": active[0].get('meterPoint', {}).get('mpan') or active[0].get('meterPoint', {}).get('mprn'),
-                                "rates": unique_rates
-                            }
-
-                if unit_rate is not None:
-                    # Convert pence to pounds
-                    self._attr_native_value = round(unit_rate / 100, 4)
-                    if not hasattr(self, '_attr_extra_state_attributes'):
-                         self._attr_extra_state_attributes = {
-                            "meter_point": active[0].get('meterPoint', {}).get('mpan') or active[0].get('meterPoint', {}).get('mprn')
-                        }
+
+
+    def _compute_state(self) -> tuple:
+        active = self.account.get_active_agreement(dt_util.now())
+        if active is None:
+            return None, None
+
+        tariff = active.tariff
+        unit_rate = tariff.unit_rate
+        attributes = {
+            "meter_point": active.mpan
+        }
+
+        # Handle HalfHourlyTariff with multiple rates
+        if unit_rate is None and tariff.unit_rates:
+            rates = tariff.unit_rates
+            # Extract unique rates
+            unique_rates = sorted(set(rates))
+            attributes["rates"] = unique_rates
+
+            # Logic for Next Drive: 00:00 - 07:00 is Off-Peak (Low)
+            is_next_drive = "Next Drive" in (tariff.display_name or "")
+
+            if is_next_drive and len(unique_rates) >= 2:
+                low_rate = unique_rates[0]
+                high_rate = unique_rates[1] # Assuming 2 rates for now
+
+                # Next Drive Off-Peak is 00:00 to 07:00
+                if 0 <= dt_util.now().hour < 7:
+                    unit_rate = low_rate
+                    attributes["current_period"] = "Off-Peak"
                 else:
-                    self._attr_native_value = None
+                    unit_rate = high_rate
+                    attributes["current_period"] = "Peak"
+
+                attributes["low_rate"] = round(low_rate / 100, 4)
+                attributes["high_rate"] = round(high_rate / 100, 4)
             else:
-                self._attr_native_value = None
-        else:
-            self._attr_native_value = None
+                # Fallback for unknown multi-rate tariffs
+                unit_rate = rates[0]
 
+        if unit_rate is None:
+            return None, None
 
-class SavingSessionsSensor(SensorEntity):
+        # Convert pence to pounds
+        return round(unit_rate / 100, 4), attributes
+
+
+class SavingSessionsSensor(EonNextSensor):
     """Upcoming and active saving sessions"""
 
-    def __init__(self, account):
+    def __init__(self, coordinator, account):
+        super().__init__(coordinator)
         self.account = account
 
         self._attr_name = f"Account {self.account.account_number} Saving Sessions"
         self._attr_icon = "mdi:piggy-bank-outline"
         self._attr_unique_id = f"{self.account.account_number}__saving_sessions"
-    
-
-    async def async_update(self) -> None:
-        await self.account._load_saving_sessions()
-        if self.account.saving_sessions:
-            # Count active/upcoming sessions
-            now = dt_util.now()
-            upcoming = []
-            active = []
-            
-            for s in self.account.saving_sessions:
-                start_str = s.get('startedAt') or s.get('startAt')
-                end_str = s.get('endedAt') or s.get('endAt')
-                
-                if start_str:
-                    start_dt = dt_util.parse_datetime(start_str)
-                    if start_dt > now:
-                        upcoming.append(s)
-                    elif end_str:
-                        end_dt = dt_util.parse_datetime(end_str)
-                        if start_dt <= now <= end_dt:
-                            active.append(s)
-
-            self._attr_native_value = len(upcoming) + len(active)
-            self._attr_extra_state_attributes = {
-                "active_count": len(active),
-                "upcoming_count": len(upcoming),
-                "sessions": [
-                    {
-                        "id": s.get('id'),
-                        "start": s.get('startedAt') or s.get('startAt'),
-                        "type": s.get('type')
-                    }
-                    for s in self.account.saving_sessions
-                ]
-            }
-        else:
-            self._attr_native_value = 0
-            self._attr_extra_state_attributes = {
+        self._unsub_boundary = None
+
+
+    def _compute_state(self) -> tuple:
+        sessions = self.account.saving_sessions
+        if not sessions:
+            return 0, {
                 "active_count": 0,
                 "upcoming_count": 0,
                 "sessions": []
             }
+
+        now = dt_util.now()
+        active = sessions.active(now)
+        upcoming = sessions.upcoming(now)
+
+        return len(upcoming) + len(active), {
+            "active_count": len(active),
+            "upcoming_count": len(upcoming),
+            "sessions": [
+                {
+                    "id": session.id,
+                    "start": session.start.isoformat(),
+                    "end": session.end.isoformat() if session.end else None,
+                    "type": session.type
+                }
+                for session in sessions
+            ]
+        }
+
+
+    def _refresh_state(self) -> bool:
+        changed = super()._refresh_state()
+        self._schedule_boundary()
+        return changed
+
+
+    def _schedule_boundary(self) -> None:
+        """Wake up when the next session starts or the active one ends, rather than polling"""
+        if self._unsub_boundary is not None:
+            self._unsub_boundary()
+            self._unsub_boundary = None
+
+        boundary = self.account.saving_sessions.next_boundary(dt_util.now())
+        if boundary is not None and self.hass is not None:
+            self._unsub_boundary = async_track_point_in_utc_time(self.hass, self._handle_boundary, boundary)
+
+
+    @callback
+    def _handle_boundary(self, now) -> None:
+        self._unsub_boundary = None
+        if self._refresh_state() == True:
+            self.async_write_ha_state()
+        # Sessions are polled rarely, so fetch them as one starts or ends to see any change of plan
+        self.hass.async_create_task(self.coordinator.async_request_refresh())
+
+
+    async def async_will_remove_from_hass(self) -> None:
+        if self._unsub_boundary is not None:
+            self._unsub_boundary()
+            self._unsub_boundary = None
+        await super().async_will_remove_from_hass()
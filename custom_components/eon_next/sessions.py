@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+
+import bisect
+import datetime
+import logging
+from dataclasses import dataclass
+
+from .dates import parse_datetime
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True, slots=True)
+class SavingSession:
+    """A saving session window"""
+    id: str
+    start: datetime.datetime
+    end: datetime.datetime = None
+    type: str = None
+
+    def is_active(self, now: datetime.datetime) -> bool:
+        return self.end is not None and self.start <= now < self.end
+
+
+class SavingSessionIndex:
+    """Saving sessions ordered by start time, refreshed incrementally by session id"""
+
+    def __init__(self):
+        self._by_id = {}
+        self._raw = {}
+        self.sessions = []
+        self._starts = []
+        self._longest = datetime.timedelta(0)
+
+
+    def __len__(self) -> int:
+        return len(self.sessions)
+
+
+    def __iter__(self):
+        return iter(self.sessions)
+
+
+    def update(self, nodes: list) -> bool:
+        """Replace the indexed sessions with `nodes`, only parsing new or changed ones"""
+        seen = set()
+        changed = False
+
+        for node in nodes:
+            session_id = node.get('id')
+            raw = (node.get('startedAt') or node.get('startAt'), node.get('endedAt') or node.get('endAt'), node.get('type'))
+            # A session without a start can't be indexed, and any earlier entry for it is dropped below
+            if raw[0] is None:
+                continue
+
+            seen.add(session_id)
+            if self._raw.get(session_id) == raw:
+                continue
+
+            self._raw[session_id] = raw
+            self._by_id[session_id] = SavingSession(session_id, parse_datetime(raw[0]), parse_datetime(raw[1]), raw[2])
+            changed = True
+
+        for session_id in list(self._by_id):
+            if session_id not in seen:
+                del self._by_id[session_id]
+                del self._raw[session_id]
+                changed = True
+
+        if changed:
+            self.sessions = sorted(self._by_id.values(), key=lambda session: session.start)
+            self._starts = [session.start for session in self.sessions]
+            self._longest = max(
+                [session.end - session.start for session in self.sessions if session.end is not None],
+                default=datetime.timedelta(0)
+            )
+        return changed
+
+
+    def active(self, now: datetime.datetime) -> list:
+        # Only sessions starting within the longest session length of now can still be running
+        first = bisect.bisect_left(self._starts, now - self._longest)
+        last = bisect.bisect_right(self._starts, now)
+        return [session for session in self.sessions[first:last] if session.is_active(now)]
+
+
+    def upcoming(self, now: datetime.datetime) -> list:
+        return self.sessions[bisect.bisect_right(self._starts, now):]
+
+
+    def next_boundary(self, now: datetime.datetime) -> datetime.datetime:
+        """When the set of active or upcoming sessions next changes, if ever"""
+        boundaries = [session.end for session in self.active(now)]
+
+        index = bisect.bisect_right(self._starts, now)
+        if index < len(self._starts):
+            boundaries.append(self._starts[index])
+
+        boundaries = [boundary for boundary in boundaries if boundary > now]
+        return min(boundaries, default=None)
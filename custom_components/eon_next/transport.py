@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""Transports carrying GraphQL requests for `EonNext`.
+
+`AiohttpTransport` talks to the Kraken API. `RecordingTransport` wraps another
+transport and appends every exchange to a cassette file, anonymised, and
+`ReplayTransport` serves a cassette back offline with the recorded latency,
+so parsing and scheduling can be benchmarked repeatably without an account.
+"""
+
+import asyncio
+import datetime
+import hashlib
+import json
+import logging
+import os
+import time
+
+import aiohttp
+
+_LOGGER = logging.getLogger(__name__)
+
+API_URL = "https://api.eonnext-kraken.energy/v1/graphql/"
+
+# Values under these keys identify a customer, and are replaced by stable pseudonyms
+SENSITIVE_KEYS = {
+    "accountNumber",
+    "cursor",
+    "deviceId",
+    "email",
+    "endCursor",
+    "id",
+    "meterId",
+    "mpan",
+    "mprn",
+    "number",
+    "password",
+    "postcode",
+    "preferredName",
+    "refreshToken",
+    "serialNumber",
+    "token"
+}
+ZEROED_KEYS = {"balance"}
+TOKEN_CLAIMS = {"exp", "iat", "origIat"}
+
+LOGIN_OPERATIONS = {"loginEmailAuthentication", "refreshToken"}
+
+
+class AiohttpTransport:
+    """Posts requests to the Kraken API, reusing one HTTP session
+
+    A session passed in, such as Home Assistant's shared one, is used as is and
+    left open. Otherwise the transport opens its own, and `close` closes it.
+    """
+
+    def __init__(self, url: str = API_URL, session=None):
+        self.url = url
+        self._session = session
+        self._owns_session = session is None
+
+
+    async def post(self, operation: str, payload: dict, headers: dict) -> tuple:
+        """Send a request, returning the response (status, body bytes)"""
+        if self._owns_session and (self._session is None or self._session.closed):
+            self._session = aiohttp.ClientSession()
+
+        async with self._session.post(self.url, json=payload, headers=headers) as response:
+            return response.status, await response.read()
+
+
+    async def close(self):
+        if self._owns_session and self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+
+class Anonymiser:
+    """Replaces identifying values with pseudonyms that are stable within one recording"""
+
+    def __init__(self):
+        self.salt = os.urandom(16)
+
+
+    def pseudonym(self, value: str) -> str:
+        return "anon-" + hashlib.sha256(self.salt + str(value).encode()).hexdigest()[:12]
+
+
+    def anonymise(self, data, key: str = None):
+        if isinstance(data, dict):
+            if key == "payload":
+                # JWT claims, only their timing is needed to replay a login
+                return {claim: value for claim, value in data.items() if claim in TOKEN_CLAIMS}
+            return {item_key: self.anonymise(value, item_key) for item_key, value in data.items()}
+        if isinstance(data, list):
+            return [self.anonymise(value, key) for value in data]
+        if key in ZEROED_KEYS and isinstance(data, (int, float)):
+            return 0
+        if key in SENSITIVE_KEYS and isinstance(data, str) and data != "":
+            return self.pseudonym(data)
+        return data
+
+
+
+def _request_key(operation: str, variables: dict) -> str:
+    return operation + " " + json.dumps(variables, sort_keys=True)
+
+
+class RecordingTransport:
+    """Passes requests to another transport and appends each exchange to a cassette"""
+
+    def __init__(self, path: str, inner=None, anonymise: bool = True):
+        self.path = path
+        self.inner = inner if inner is not None else AiohttpTransport()
+        self.anonymiser = Anonymiser() if anonymise else None
+
+
+    async def post(self, operation: str, payload: dict, headers: dict) -> tuple:
+        started = time.perf_counter()
+        status, body = await self.inner.post(operation, payload, headers)
+        elapsed = time.perf_counter() - started
+
+        variables = payload.get("variables") or {}
+        try:
+            response = json.loads(body)
+        except ValueError:
+            response = None
+
+        if self.anonymiser is not None:
+            variables = self.anonymiser.anonymise(variables)
+            response = self.anonymiser.anonymise(response)
+
+        entry = {
+            "operation": operation,
+            "variables": variables,
+            "status": status,
+            "elapsed": elapsed,
+            "response": response
+        }
+        if response is None:
+            entry["raw"] = bytes(body).decode("utf-8", errors="replace")
+
+        with open(self.path, "a") as handle:
+            handle.write(json.dumps(entry) + "\n")
+
+        return status, body
+
+
+    async def close(self):
+        await self.inner.close()
+
+
+
+class ReplayTransport:
+    """Serves recorded exchanges back offline, optionally with scaled latency
+
+    Requests are matched on operation and variables. Logins, whose variables are
+    never recorded as sent, fall back to matching on operation alone. Repeated
+    requests cycle through the matching recordings.
+    """
+
+    def __init__(self, path: str, latency_scale: float = 1.0):
+        self.latency_scale = latency_scale
+        self._by_request = {}
+        self._by_operation = {}
+        self._positions = {}
+
+        with open(path) as handle:
+            for line in handle:
+                if line.strip() == "":
+                    continue
+                entry = json.loads(line)
+                self._by_request.setdefault(_request_key(entry['operation'], entry['variables']), []).append(entry)
+                self._by_operation.setdefault(entry['operation'], []).append(entry)
+
+
+    def _next(self, key: str, entries: list) -> dict:
+        position = self._positions.get(key, 0)
+        self._positions[key] = position + 1
+        return entries[position % len(entries)]
+
+
+    def _rebase_token(self, response: dict) -> dict:
+        """Move a recorded login's expiry times so they are as far ahead of now as they were then"""
+        token = ((response or {}).get('data') or {}).get('obtainKrakenToken')
+        if not token or 'payload' not in token or 'iat' not in token['payload']:
+            return response
+
+        now = int(datetime.datetime.now().timestamp())
+        shift = now - token['payload']['iat']
+        token = dict(token, payload=dict(token['payload']))
+        token['payload']['iat'] = now
+        if 'exp' in token['payload']:
+            token['payload']['exp'] += shift
+        if isinstance(token.get('refreshExpiresIn'), int):
+            token['refreshExpiresIn'] += shift
+        return dict(response, data=dict(response['data'], obtainKrakenToken=token))
+
+
+    async def post(self, operation: str, payload: dict, headers: dict) -> tuple:
+        key = _request_key(operation, payload.get("variables") or {})
+        if key in self._by_request:
+            entry = self._next(key, self._by_request[key])
+        elif operation in self._by_operation:
+            entry = self._next(operation, self._by_operation[operation])
+        else:
+            raise Exception(f"No recording for {operation} in the replay cassette")
+
+        if self.latency_scale > 0:
+            await asyncio.sleep(entry['elapsed'] * self.latency_scale)
+
+        if entry['response'] is None:
+            return entry['status'], entry.get('raw', "").encode()
+
+        response = entry['response']
+        if operation in LOGIN_OPERATIONS:
+            response = self._rebase_token(response)
+        return entry['status'], json.dumps(response).encode()
+
+
+    async def close(self):
+        pass